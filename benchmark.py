@@ -0,0 +1,1224 @@
+import argparse
+import http.server
+import json
+import math
+import os
+import socket
+import tempfile
+import random
+import threading
+import time
+import tracemalloc
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError, as_completed
+
+import geodesy
+from fix_filter import FixFilter
+from follow_camera import FollowCamera
+from nmea_provider import NmeaProvider, format_sentence
+from track_format import MappedTrack, read_track, write_mapped_track, write_track
+from track_geometry import TrackGeometry
+from replay_provider import ReplayProvider
+from ride_journal import RideJournal
+from synthetic_ride import SyntheticRide
+from tile_cache import DirectoryTileCache, SqliteTileCache, TextureCache
+from tile_queue import CompletionQueue, TileQueue
+from track_store import TrackStore
+from tracking_engine import TrackingEngine
+
+TILE_SIZE = 256
+RENDER_RATE = 10  # Hz, wie UI_REFRESH_RATE in main.py
+LATENCY_RESOLUTION = 20  # Histogramm-Klassen pro Faktor e, also ca. 5 % breit
+
+
+def mercator(lat, lon):
+    # gleiche Projektion wie MapSource.get_x/get_y bei Zoom 0, aber ohne Kivy
+    lat = math.radians(-lat)
+    x = (lon + 180.0) / 360.0 * TILE_SIZE
+    y = (1.0 - math.log(math.tan(lat) + 1.0 / math.cos(lat)) / math.pi) / 2.0 * TILE_SIZE
+    return x, y
+
+
+def random_walk(count, seed=1, lat=52.5200, lon=13.4050):
+    # ca. 20 km/h bei 1 Hz mit langsam drehendem Kurs und etwas GPS-Rauschen
+    rnd = random.Random(seed)
+    heading = rnd.uniform(0, 2 * math.pi)
+    step = 5.5 / 111000.0
+    points = []
+    for _ in range(count):
+        heading += rnd.gauss(0, 0.05)
+        lat += step * math.cos(heading)
+        lon += step * math.sin(heading) / math.cos(math.radians(lat))
+        points.append((lat + rnd.gauss(0, 0.00002), lon + rnd.gauss(0, 0.00002)))
+    return points
+
+
+def noisy_ride(seconds, seed=1, rate=1.0, lat=52.5200, lon=13.4050):
+    # Stadtfahrt mit Ampelstopps: wahre Position plus GPS-Rauschen (4 m) und
+    # vereinzelten Ausreißern; liefert (wahr_lat, wahr_lon, lat, lon, Zeit, Genauigkeit)
+    rnd = random.Random(seed)
+    heading = rnd.uniform(0, 2 * math.pi)
+    speed = 0.0
+    phase_end = 0.0
+    moving = False
+    fixes = []
+    dt = 1.0 / rate
+    t = 0.0
+    while t < seconds:
+        if t >= phase_end:
+            moving = not moving
+            speed = rnd.uniform(4.0, 8.0) if moving else 0.0
+            phase_end = t + (rnd.uniform(60, 300) if moving else rnd.uniform(20, 60))
+        if moving:
+            heading += rnd.gauss(0, 0.05 * dt)
+            lat += speed * dt * math.cos(heading) / 111320.0
+            lon += speed * dt * math.sin(heading) / (111320.0 * math.cos(math.radians(lat)))
+        accuracy = rnd.uniform(3.0, 8.0)
+        noise = 4.0
+        if rnd.random() < 0.01:
+            noise = rnd.uniform(100, 300)
+        fixes.append((
+            lat, lon,
+            lat + rnd.gauss(0, noise) / 111320.0,
+            lon + rnd.gauss(0, noise) / (111320.0 * math.cos(math.radians(lat))),
+            1.7e9 + t, accuracy,
+        ))
+        t += dt
+    return fixes
+
+
+def viewport(lat, lon, zoom, width=1080, height=1920):
+    # Viewport in Weltkoordinaten, wie TrackLayer ihn aus MapView.get_bbox() berechnet
+    x, y = mercator(lat, lon)
+    half_w = width / 2.0 / 2.0 ** zoom
+    half_h = height / 2.0 / 2.0 ** zoom
+    return x - half_w, y - half_h, x + half_w, y + half_h
+
+
+def bench_render(args):
+    print(f"{'Punkte':>10} {'pro Fix (µs)':>14}")
+    for size in args.sizes:
+        points = random_walk(size + args.fixes, seed=args.seed)
+        geometry = TrackGeometry(mercator)
+        geometry.extend(points[:size])
+        geometry.set_view(12, *viewport(*points[size], 12))
+        geometry.pop_changes()
+
+        start = time.perf_counter()
+        for lat, lon in points[size:]:
+            geometry.append(lat, lon)
+            geometry.set_view(12, *viewport(lat, lon, 12))
+            # entspricht dem Kopieren in Line.points für jeden geänderten Chunk
+            _, dirty, _, tail_dirty = geometry.pop_changes()
+            for index in dirty:
+                list(geometry.chunks[index])
+            if tail_dirty:
+                list(geometry.tail)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>10} {elapsed / args.fixes * 1e6:>14.2f}")
+
+
+def bench_pan(args):
+    print(f"{'Punkte':>10} {'pro Frame (µs)':>16}")
+    for size in args.sizes:
+        points = random_walk(size, seed=args.seed)
+        geometry = TrackGeometry(mercator)
+        geometry.extend(points)
+        view = viewport(*points[-1], 12)
+        geometry.set_view(12, *view)
+        geometry.pop_changes()
+
+        # pro Frame beim Verschieben: gleicher Zoom, der Viewport wandert ein Pixel
+        step = 1.0 / 2.0 ** 12
+        start = time.perf_counter()
+        for frame in range(args.frames):
+            offset = (frame % 100) * step
+            geometry.set_view(12, view[0] + offset, view[1], view[2] + offset, view[3])
+            geometry.pop_changes()
+        elapsed = time.perf_counter() - start
+        print(f"{size:>10} {elapsed / args.frames * 1e6:>16.2f}")
+
+
+def bench_lod(args):
+    geometry = TrackGeometry(mercator)
+    start = time.perf_counter()
+    geometry.extend(random_walk(args.points, seed=args.seed))
+    elapsed = time.perf_counter() - start
+    print(f"{args.points} Punkte inkl. Pyramide in {elapsed:.2f} s aufgebaut")
+    print(f"{'Zoom':>6} {'Vertices':>10}")
+    # ganzer Track im Bild: Viewport über die gesamte Welt
+    for zoom in args.zooms:
+        geometry.set_view(zoom, 0, 0, TILE_SIZE, TILE_SIZE)
+        print(f"{zoom:>6} {geometry.vertex_count():>10}")
+
+
+def bench_cull(args):
+    # Strecke in Kilometern bei ca. 5.5 m pro Fix
+    points = random_walk(int(args.km * 1000 / 5.5), seed=args.seed)
+    geometry = TrackGeometry(mercator)
+    geometry.extend(points)
+    print(f"{len(points)} Punkte, {args.km} km")
+    print(f"{'Zoom':>6} {'Vertices':>10} {'Chunks':>8} {'Abfrage (µs)':>14}")
+    for zoom in args.zooms:
+        view = viewport(*points[len(points) // 2], zoom)
+        geometry.set_view(zoom, *view)
+        geometry.pop_changes()
+        start = time.perf_counter()
+        for _ in range(100):
+            geometry.pyramid.chunk_index(geometry.level).query(*view)
+        elapsed = (time.perf_counter() - start) / 100
+        print(f"{zoom:>6} {geometry.vertex_count():>10} {len(geometry.chunks):>8} {elapsed * 1e6:>14.1f}")
+
+
+def bench_memory(args):
+    points = random_walk(args.points, seed=args.seed)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    track = TrackStore()
+    for i, (lat, lon) in enumerate(points):
+        track.append(lat, lon, 1.7e9 + i, 5.0, 40.0)
+    store_bytes = tracemalloc.get_traced_memory()[0] - before
+
+    before = tracemalloc.get_traced_memory()[0]
+    legacy = [(lat + 0.0, lon + 0.0) for lat, lon in points]
+    legacy_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del legacy
+
+    print(f"{args.points} Punkte")
+    print(f"TrackStore (5 Spalten):     {store_bytes / 1e6:8.1f} MB")
+    print(f"Liste von (lat, lon)-Tupeln: {legacy_bytes / 1e6:8.1f} MB")
+
+
+def synthetic_track(count, seed=1):
+    track = TrackStore()
+    for i, (lat, lon) in enumerate(random_walk(count, seed=seed)):
+        track.append(lat, lon, 1.7e9 + i, 5.0 + (i % 7), 40.0 + (i % 50) * 0.1)
+    return track
+
+
+def bench_format(args):
+    print(f"{'Punkte':>10} {'Format':>10} {'Größe (kB)':>12} {'Laden (s)':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            track = synthetic_track(size, seed=args.seed)
+            meta = {"distance_km": 0.0, "ride_duration_sec": size}
+
+            path = os.path.join(tmp, "track.json")
+            with open(path, "w") as f:
+                json.dump(dict(meta, track_points=list(track.points())), f, indent=2)
+            files = [("json", path)]
+            for compression in ("none", "zlib", "lzma"):
+                path = os.path.join(tmp, f"track_{compression}.trk")
+                write_track(path, track, meta, compression=compression)
+                files.append((f"v2 {compression}", path))
+            path = os.path.join(tmp, "track_mapped.trk")
+            write_mapped_track(path, track, meta)
+            files.append(("v3 mmap", path))
+
+            for name, path in files:
+                start = time.perf_counter()
+                loaded, _ = read_track(path)
+                elapsed = time.perf_counter() - start
+                assert len(loaded) == size
+                if isinstance(loaded, MappedTrack):
+                    loaded.close()
+                print(f"{size:>10} {name:>10} {os.path.getsize(path) / 1e3:>12.1f} {elapsed:>10.3f}")
+
+
+def bench_load(args):
+    # geladenen Track in TrackStore und Kartengeometrie übernehmen: Punkt für
+    # Punkt wie bei einem Live-Fix gegen einen Block für den ganzen Track
+    print(f"{'Punkte':>10} {'Weg':>10} {'Store (s)':>10} {'Geometrie (s)':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, "track.trk")
+            write_mapped_track(path, synthetic_track(size, seed=args.seed))
+            track = MappedTrack(path)
+            view = viewport(*track[-1], args.zoom)
+
+            start = time.perf_counter()
+            store = TrackStore()
+            for i in range(size):
+                store.append(track.lat[i], track.lon[i], track.timestamp[i], track.accuracy[i], track.elevation[i])
+            store_time = time.perf_counter() - start
+            start = time.perf_counter()
+            geometry = TrackGeometry(mercator)
+            geometry.set_view(args.zoom, *view)
+            for lat, lon in track.points():
+                geometry.append(lat, lon)
+            print(f"{size:>10} {'einzeln':>10} {store_time:>10.3f} {time.perf_counter() - start:>14.3f}")
+
+            start = time.perf_counter()
+            store = TrackStore()
+            store.extend(track.lat, track.lon, track.timestamp, track.accuracy, track.elevation)
+            store_time = time.perf_counter() - start
+            start = time.perf_counter()
+            bulk = TrackGeometry(mercator)
+            bulk.set_view(args.zoom, *view)
+            bulk.extend(track.points())
+            print(f"{size:>10} {'Block':>10} {store_time:>10.3f} {time.perf_counter() - start:>14.3f}")
+            assert bulk.tail == geometry.tail and bulk.vertex_count() == geometry.vertex_count()
+            track.close()
+
+
+def visible_tiles(cx, cy, width, height):
+    # Kachelbereich wie MapView.bbox_for_zoom, um den Mittelpunkt (cx, cy) in Kartenpixeln
+    vx = cx - width / 2.0
+    vy = cy - height / 2.0
+    first_x = int(vx // TILE_SIZE)
+    first_y = int(vy // TILE_SIZE)
+    x_count = math.ceil(width / TILE_SIZE) + 1
+    y_count = math.ceil(height / TILE_SIZE) + 1
+    return {(x, y) for x in range(first_x, first_x + x_count) for y in range(first_y, first_y + y_count)}
+
+
+def bench_follow(args):
+    # Kachel-Umbau pro Fix: center_on (voller Refresh, alle Kacheln neu in den
+    # Canvas) gegen die Folgekamera (nur Kacheln, die rein- oder rausfallen)
+    factor = 2.0 ** args.zoom
+    points = [(x * factor, y * factor) for x, y in (mercator(lat, lon) for lat, lon in random_walk(args.fixes, args.seed))]
+    size = (args.width, args.height)
+
+    churn = 0
+    for x, y in points:
+        churn += len(visible_tiles(x, y, *size))
+    print(f"center_on:     {churn / len(points):8.2f} Kacheloperationen pro Fix")
+
+    camera = FollowCamera()
+    center = points[0]
+    tiles = visible_tiles(*center, *size)
+    churn = 0
+    frames = 0
+    for target in points[1:]:
+        # bis zum nächsten Fix läuft die Kamera höchstens eine Sekunde
+        for _ in range(args.fps):
+            dx, dy = camera.update(center, target, size, 1.0 / args.fps)
+            frames += 1
+            if dx or dy:
+                center = (center[0] + dx, center[1] + dy)
+                current = visible_tiles(*center, *size)
+                churn += len(current - tiles) + len(tiles - current)
+                tiles = current
+            if not camera.moving:
+                break
+    print(f"Folgekamera:   {churn / len(points):8.2f} Kacheloperationen pro Fix, {frames / len(points):.1f} Frames pro Fix")
+
+
+def bench_ingest(args):
+    # Fixes pro Minute durch die TrackingEngine, ohne Fenster, mit und ohne Journal
+    points = random_walk(args.fixes, seed=args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, journal in (("ohne Journal", None), ("mit Journal", RideJournal(os.path.join(tmp, "ride.journal")))):
+            engine = TrackingEngine(journal)
+            events = []
+            engine.bind(lambda event, engine: events.append(event))
+            engine.start()
+            start = time.perf_counter()
+            add_fix = engine.add_fix
+            for i, (lat, lon) in enumerate(points):
+                add_fix(lat, lon, 1.7e9 + i, 5.0)
+            elapsed = time.perf_counter() - start
+            engine.stop()
+            assert len(engine.track) == args.fixes and events.count("fix") == args.fixes
+            print(f"{name:>14}: {args.fixes / elapsed * 60 / 1e6:6.2f} Mio. Fixes pro Minute, {engine.distance:.1f} km")
+
+
+def bench_distance(args):
+    # Genauigkeit der alten Näherung gegen Haversine/Vincenty und Kosten
+    # der inkrementellen bzw. Batch-Berechnung
+    track = synthetic_track(args.points, seed=args.seed)
+    lats, lons = track.lat, track.lon
+
+    start = time.perf_counter()
+    flat = sum(((lats[i] - lats[i - 1]) ** 2 + (lons[i] - lons[i - 1]) ** 2) ** 0.5 * 111 for i in range(1, len(lats)))
+    flat_time = time.perf_counter() - start
+    start = time.perf_counter()
+    meter = geodesy.DistanceMeter()
+    for lat, lon in zip(lats, lons):
+        meter.add(lat, lon)
+    meter_time = time.perf_counter() - start
+    start = time.perf_counter()
+    batch = geodesy.track_distance_km(lats, lons)
+    batch_time = time.perf_counter() - start
+    start = time.perf_counter()
+    vincenty = sum(geodesy.vincenty_km(lats[i - 1], lons[i - 1], lats[i], lons[i]) for i in range(1, len(lats)))
+    vincenty_time = time.perf_counter() - start
+
+    backend = "NumPy" if geodesy.numpy is not None else "math"
+    print(f"{args.points} Punkte bei 52° N")
+    print(f"{'sqrt*111':>20}: {flat:10.3f} km  {flat_time / args.points * 1e6:6.2f} µs/Punkt")
+    print(f"{'Haversine inkr.':>20}: {meter.total:10.3f} km  {meter_time / args.points * 1e6:6.2f} µs/Punkt")
+    print(f"{'Haversine ' + backend:>20}: {batch:10.3f} km  {batch_time / args.points * 1e6:6.2f} µs/Punkt")
+    print(f"{'Vincenty':>20}: {vincenty:10.3f} km  {vincenty_time / args.points * 1e6:6.2f} µs/Punkt")
+
+
+def bench_filter(args):
+    # Punktzahl, Abweichung von der wahren Position und gemessene Distanz
+    # ohne und mit FixFilter
+    for rate in args.rates:
+        fixes = noisy_ride(args.seconds, seed=args.seed, rate=rate)
+        fix_filter = FixFilter()
+        raw_errors = []
+        errors = []
+        kept = []
+        start = time.perf_counter()
+        for true_lat, true_lon, lat, lon, timestamp, accuracy in fixes:
+            result = fix_filter.process(lat, lon, timestamp, accuracy)
+            if result is not None:
+                kept.append((result, (true_lat, true_lon)))
+        elapsed = time.perf_counter() - start
+        for true_lat, true_lon, lat, lon, _, _ in fixes:
+            raw_errors.append(geodesy.haversine_km(true_lat, true_lon, lat, lon) * 1000)
+        for (lat, lon), (true_lat, true_lon) in kept:
+            errors.append(geodesy.haversine_km(true_lat, true_lon, lat, lon) * 1000)
+        raw_errors.sort()
+        errors.sort()
+
+        truth = geodesy.track_distance_km([f[0] for f in fixes], [f[1] for f in fixes])
+        raw = geodesy.track_distance_km([f[2] for f in fixes], [f[3] for f in fixes])
+        filtered = geodesy.track_distance_km([p[0][0] for p in kept], [p[0][1] for p in kept])
+        print(f"{rate:g} Hz, {len(fixes)} Fixes, {elapsed / len(fixes) * 1e6:.1f} µs/Fix")
+        print(f"  Punkte:     {len(fixes)} -> {len(kept)} ({1 - len(kept) / len(fixes):.0%} weniger),"
+              f" {fix_filter.rejected} verworfen, {fix_filter.dropped} ausgedünnt")
+        print(f"  Abweichung: roh Median {raw_errors[len(raw_errors) // 2]:.1f} m / 95% {raw_errors[int(len(raw_errors) * 0.95)]:.1f} m,"
+              f" gefiltert Median {errors[len(errors) // 2]:.1f} m / 95% {errors[int(len(errors) * 0.95)]:.1f} m")
+        print(f"  Distanz:    wahr {truth:.2f} km, roh {raw:.2f} km, gefiltert {filtered:.2f} km")
+
+
+def bench_stats(args):
+    # gleitende Kennzahlen der Engine auf der verrauschten Stadtfahrt:
+    # Kosten pro Fix, Unruhe der Anzeige und Bewegungszeit gegen die Wahrheit
+    fixes = noisy_ride(args.seconds, seed=args.seed, rate=args.rate)
+    engine = TrackingEngine(fix_filter=FixFilter())
+    engine.start()
+    speeds = []
+    naive = []
+    previous = None
+    start = time.perf_counter()
+    for _, _, lat, lon, timestamp, accuracy in fixes:
+        if engine.add_fix(lat, lon, timestamp, accuracy):
+            speeds.append(engine.speed)
+            if previous is not None:
+                naive.append(geodesy.haversine_km(previous[0], previous[1], lat, lon) / (timestamp - previous[2]) * 3600)
+            previous = (lat, lon, timestamp)
+    elapsed = time.perf_counter() - start
+
+    dt = 1.0 / args.rate
+    true_moving = sum(dt for i in range(1, len(fixes)) if fixes[i][:2] != fixes[i - 1][:2])
+    stats = engine.stats
+
+    def jitter(values):
+        return sum(abs(values[i] - values[i - 1]) for i in range(1, len(values))) / max(len(values) - 1, 1)
+
+    print(f"{args.rate:g} Hz, {len(fixes)} Fixes, {elapsed / len(fixes) * 1e6:.1f} µs/Fix inkl. Filter")
+    print(f"  Unruhe:       zwei Fixes {jitter(naive):.2f} km/h, 5-s-Fenster {jitter(speeds):.2f} km/h pro Fix")
+    print(f"  Fenster:      {', '.join(f'{w} s {stats.speed(i):.1f}' for i, w in enumerate(stats.windows))} km/h")
+    print(f"  Höchstwert:   {stats.max_speed:.1f} km/h (wahr höchstens 28.8 km/h)")
+    print(f"  Bewegungszeit {stats.moving_time / 60:.1f} min (wahr {true_moving / 60:.1f} min) von {args.seconds / 60:.0f} min")
+    print(f"  Durchschnitt  {stats.average_speed:.1f} km/h, Pace {stats.pace:.2f} min/km")
+
+
+def bench_replay(args):
+    # Ende-zu-Ende ohne Fenster: Track abspielen (so schnell wie möglich) durch
+    # Filter, Engine, Statistik und Kartengeometrie wie in der App. Die
+    # Zählwerte sind bei jedem Lauf gleich, nur die Zeiten schwanken; mit
+    # --json als Bericht für den Vergleich zwischen Versionen
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.path
+        if path is None:
+            path = os.path.join(tmp, "ride.trk")
+            track = TrackStore()
+            for _, _, lat, lon, timestamp, accuracy in noisy_ride(args.seconds, seed=args.seed, rate=args.rate):
+                track.append(lat, lon, timestamp, accuracy)
+            write_mapped_track(path, track)
+        replay = ReplayProvider.from_file(path, speed=0)
+
+        engine = TrackingEngine(fix_filter=FixFilter())
+        geometry = TrackGeometry(mercator)
+        lat, lon = replay.track[0]
+        geometry.set_view(args.zoom, *viewport(lat, lon, args.zoom))
+        frames = 0
+
+        def on_location(lat, lon, timestamp, accuracy, altitude):
+            engine.add_fix(lat, lon, timestamp, accuracy, altitude)
+
+        def render():
+            # wie TrackLayer.update mit _render_fix: neue Punkte in die Geometrie
+            track = engine.track
+            if len(track) > geometry.count:
+                geometry.extend(track.points(geometry.count))
+                geometry.pop_changes()
+
+        replay.configure(on_location=on_location)
+        engine.start()
+        replay.start()
+        start = time.perf_counter()
+        ingest = 0.0
+        drawing = 0.0
+        while not replay.finished:
+            # ein Frame: fällige Fixes, dann einmal zeichnen
+            frame = time.perf_counter()
+            replay.pump()
+            mid = time.perf_counter()
+            render()
+            ingest += mid - frame
+            drawing += time.perf_counter() - mid
+            frames += 1
+        elapsed = time.perf_counter() - start
+        engine.stop()
+        if isinstance(replay.track, MappedTrack):
+            replay.track.close()
+
+    count = len(replay)
+    report = {
+        "fixes": count,
+        "frames": frames,
+        "points": len(engine.track),
+        "vertices": geometry.vertex_count(),
+        "distance_km": round(engine.distance, 6),
+        "moving_time_s": round(engine.stats.moving_time, 3),
+        "max_speed_kmh": round(engine.stats.max_speed, 3),
+        "us_per_fix": round(elapsed / count * 1e6, 2),
+        "ingest_us_per_fix": round(ingest / count * 1e6, 2),
+        "draw_us_per_fix": round(drawing / count * 1e6, 2),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{count} Fixes in {frames} Frames, {report['points']} Punkte im Track, {report['vertices']} Vertices")
+    print(f"Distanz {report['distance_km']:.3f} km, Bewegungszeit {report['moving_time_s'] / 60:.1f} min,"
+          f" max {report['max_speed_kmh']:.1f} km/h")
+    print(f"{report['us_per_fix']:.1f} µs/Fix gesamt: {report['ingest_us_per_fix']:.1f} Aufnahme,"
+          f" {report['draw_us_per_fix']:.1f} Geometrie")
+
+
+def resident_mb():
+    # aktueller Speicher des Prozesses; ohne /proc (macOS) nur der Höchststand
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 20
+
+
+def latency_percentile(histogram, count, fraction):
+    # Perzentil in µs aus dem logarithmischen Histogramm {Klasse: Anzahl}
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen >= fraction * count:
+            return math.exp((bucket + 0.5) / LATENCY_RESOLUTION) / 1000
+    return 0.0
+
+
+def bench_stress(args):
+    # Dauerlast: synthetische Fahrt mit hoher Fix-Rate über Stunden durch
+    # Filter, Engine, Statistik und Journal, dazu die Kartengeometrie im Takt
+    # von _render. Latenzen landen in einem Histogramm statt einer Liste, damit
+    # die Messung den Speicher nicht selbst wachsen lässt.
+    reports = []
+    for rate in args.rates:
+        ride = SyntheticRide(seed=args.seed, rate=rate)
+        with tempfile.TemporaryDirectory() as tmp:
+            journal = None if args.no_journal else RideJournal(os.path.join(tmp, "ride.journal"))
+            engine = TrackingEngine(journal, None if args.no_filter else FixFilter())
+            geometry = TrackGeometry(mercator)
+            geometry.set_view(args.zoom, *viewport(ride.lat, ride.lon, args.zoom))
+            engine.start()
+
+            histogram = {}
+            frame = max(int(rate / RENDER_RATE), 1)  # Fixes zwischen zwei Frames
+            checkpoint = max(int(rate * args.checkpoint), 1)
+            memory = []
+            ingest = 0
+            drawing = 0
+            clock = time.perf_counter_ns
+            log = math.log
+            add_fix = engine.add_fix
+            baseline = resident_mb()
+            start = time.perf_counter()
+            count = 0
+            for count, (lat, lon, timestamp, accuracy, altitude) in enumerate(ride.fixes(args.hours * 3600), 1):
+                before = clock()
+                add_fix(lat, lon, timestamp, accuracy, altitude)
+                elapsed = clock() - before
+                ingest += elapsed
+                bucket = int(log(elapsed or 1) * LATENCY_RESOLUTION)
+                histogram[bucket] = histogram.get(bucket, 0) + 1
+                if count % frame == 0:
+                    before = clock()
+                    track = engine.track
+                    if len(track) > geometry.count:
+                        geometry.extend(track.points(geometry.count))
+                        geometry.pop_changes()
+                    drawing += clock() - before
+                if count % checkpoint == 0:
+                    memory.append({
+                        "ride_s": round(count / rate),
+                        "points": len(engine.track),
+                        "rss_mb": round(resident_mb() - baseline, 2),
+                    })
+            wall = time.perf_counter() - start
+            engine.stop()
+
+        busy = (ingest + drawing) / 1e9
+        growth = memory[-1]["rss_mb"] - memory[0]["rss_mb"] if memory else 0.0
+        report = {
+            "rate_hz": rate,
+            "ride_s": args.hours * 3600,
+            "fixes": count,
+            "points": len(engine.track),
+            "distance_km": round(engine.distance, 3),
+            "throughput_fixes_per_s": round(count / busy),
+            "wall_s": round(wall, 2),
+            "latency_us": {name: round(latency_percentile(histogram, count, fraction), 2)
+                           for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p999", 0.999))},
+            "latency_max_us": round(math.exp((max(histogram) + 1) / LATENCY_RESOLUTION) / 1000, 2),
+            "draw_us_per_fix": round(drawing / count / 1000, 2),
+            "rss_growth_mb_per_hour": round(growth / args.hours, 2),
+            "memory": memory,
+        }
+        reports.append(report)
+        latency = report["latency_us"]
+        print(f"{rate:g} Hz, {args.hours:g} h: {count} Fixes -> {report['points']} Punkte,"
+              f" {report['throughput_fixes_per_s']} Fixes/s, Fix p50 {latency['p50']:.1f} µs,"
+              f" p99 {latency['p99']:.1f} µs, max {report['latency_max_us']:.0f} µs,"
+              f" Speicher +{report['rss_growth_mb_per_hour']:.1f} MB/h")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"seed": args.seed, "filter": not args.no_filter, "journal": not args.no_journal,
+                       "runs": reports}, f, indent=2)
+        print(f"Bericht: {args.report}")
+
+
+def nmea_degrees(value, positive, negative, width):
+    # Dezimalgrad nach NMEA (d)ddmm.mmmmm mit Halbkugel
+    hemisphere = positive if value >= 0 else negative
+    value = abs(value)
+    degrees = int(value)
+    return f"{degrees:0{width}d}{(value - degrees) * 60:08.5f}", hemisphere
+
+
+def nmea_stream(seconds, rate, seed=1, corrupt=0.0):
+    # NMEA-Mitschnitt einer synthetischen Fahrt wie von einem typischen
+    # Empfänger: pro Messung GGA, GSA, drei GSV und RMC; ein Anteil corrupt
+    # der Sätze bekommt ein falsches Byte. Gibt (Bytes, Messungen) zurück.
+    rnd = random.Random(seed)
+    chunks = []
+    epochs = 0
+    for lat, lon, timestamp, accuracy, altitude in SyntheticRide(seed=seed, rate=rate).fixes(seconds):
+        when = time.gmtime(timestamp)
+        utc = f"{when.tm_hour:02d}{when.tm_min:02d}{when.tm_sec + timestamp % 1:05.2f}"
+        date = f"{when.tm_mday:02d}{when.tm_mon:02d}{when.tm_year % 100:02d}"
+        lat_text, ns = nmea_degrees(lat, "N", "S", 2)
+        lon_text, ew = nmea_degrees(lon, "E", "W", 3)
+        hdop = f"{accuracy / 4:.1f}"
+        sentences = [
+            format_sentence("GPGGA", utc, lat_text, ns, lon_text, ew, 1, 9, hdop, f"{altitude:.1f}", "M", "46.9", "M", "", ""),
+            format_sentence("GPGSA", "A", 3, 4, 5, 9, 12, 15, 18, 21, 24, 29, "", "", "", "1.8", hdop, "1.2"),
+        ]
+        for part in range(1, 4):
+            sentences.append(format_sentence("GPGSV", 3, part, 11, *(f"{rnd.randint(1, 32):02d},{rnd.randint(5, 85)},{rnd.randint(0, 359):03d},{rnd.randint(20, 45)}" for _ in range(4))))
+        sentences.append(format_sentence("GPRMC", utc, "A", lat_text, ns, lon_text, ew, "12.3", "084.4", date, "", "", "A"))
+        for sentence in sentences:
+            if rnd.random() < corrupt:
+                position = rnd.randrange(1, len(sentence) - 5)
+                sentence = sentence[:position] + b"#" + sentence[position + 1:]
+            chunks.append(sentence)
+        epochs += 1
+    return b"".join(chunks), epochs
+
+
+def bench_nmea(args):
+    # NMEA-Parser und Fix-Zusammenbau: CPU pro Fix bei Stücken wie von einer
+    # seriellen Schnittstelle, dazu optional über eine lokale TCP-Verbindung
+    data, epochs = nmea_stream(args.seconds, args.rate, seed=args.seed, corrupt=args.corrupt)
+    fixes = []
+    provider = NmeaProvider("benchmark")
+    provider.configure(on_location=lambda **fix: fixes.append(fix))
+    start = time.process_time()
+    for offset in range(0, len(data), args.chunk):
+        provider.feed(data[offset:offset + args.chunk])
+    elapsed = time.process_time() - start
+    parser = provider.parser
+    print(f"{epochs} Messungen bei {args.rate:g} Hz, {len(data) / 1e6:.1f} MB in {args.chunk}-Byte-Stücken")
+    print(f"  {len(fixes)} Fixes, {parser.valid} Sätze gültig, {parser.invalid} verworfen, {parser.skipped} übersprungen")
+    print(f"  {elapsed / max(len(fixes), 1) * 1e6:.1f} µs CPU pro Fix,"
+          f" {elapsed / args.seconds:.3%} CPU bei {args.rate:g} Hz Echtzeit")
+    if not args.corrupt:
+        assert len(fixes) == epochs and parser.invalid == 0
+
+    if args.tcp:
+        # lokaler Stand-in für einen NMEA-Server (z.B. gpsd oder eine Handy-App)
+        server = socket.create_server(("127.0.0.1", 0))
+        port = server.getsockname()[1]
+
+        def serve():
+            connection, _ = server.accept()
+            with connection:
+                connection.sendall(data)
+            server.close()
+
+        threading.Thread(target=serve, daemon=True).start()
+        received = []
+        done = threading.Event()
+        provider = NmeaProvider(f"tcp://127.0.0.1:{port}")
+        provider.configure(on_location=lambda **fix: received.append(fix),
+                           on_status=lambda kind, message: kind != "provider-enabled" and done.set())
+        start = time.perf_counter()
+        provider.start()
+        done.wait(60)
+        elapsed = time.perf_counter() - start
+        provider.stop()
+        print(f"  TCP: {len(received)} Fixes in {elapsed:.2f} s, {len(received) / elapsed:.0f} Fixes/s")
+        assert received == fixes
+
+
+class StandInTileServer:
+    # lokaler Ersatz für einen Kachelserver: pro Subdomain ein eigener Port
+    # (für urllib3 ein eigener Host), künstliche Verzögerung beim
+    # Verbindungsaufbau (TCP + TLS) und pro Anfrage (Round Trip)
+    def __init__(self, subdomains=3, handshake=0.06, latency=0.03, size=20000):
+        self.handshake = handshake
+        self.latency = latency
+        self.payload = bytes(random.Random(1).getrandbits(8) for _ in range(size))
+        self.count = subdomains
+        self.servers = []
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+
+    def __enter__(self):
+        stand_in = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Antwort in einem Stück senden: sonst bremsen Nagle und verzögerte
+            # ACKs gehaltene Verbindungen künstlich um ca. 40 ms pro Anfrage
+            disable_nagle_algorithm = True
+            wbufsize = 1 << 16
+
+            def setup(self):
+                time.sleep(stand_in.handshake)
+                with stand_in.lock:
+                    stand_in.connections += 1
+                super().setup()
+
+            def do_GET(self):
+                time.sleep(stand_in.latency)
+                with stand_in.lock:
+                    stand_in.requests += 1
+                self.send_response(200)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", str(len(stand_in.payload)))
+                self.end_headers()
+                self.wfile.write(stand_in.payload)
+
+            def log_message(self, *args):
+                pass
+
+        for _ in range(self.count):
+            server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.servers.append(server)
+        return self
+
+    def __exit__(self, *exc):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:{s}/{z}/{x}/{y}.png"
+
+    @property
+    def subdomains(self):
+        return [str(server.server_address[1]) for server in self.servers]
+
+    def reset(self):
+        with self.lock:
+            self.connections = 0
+            self.requests = 0
+
+
+def bench_tiles(args):
+    # Kalter Viewport gegen den lokalen Stand-in-Server, 5 Threads wie der
+    # Downloader von mapview: requests.get pro Kachel gegen TileFetcher mit
+    # gehaltenen Verbindungen; danach ein Schwenk um eine Bildschirmbreite
+    import requests  # wie in mapview; hier erst, damit die übrigen Benchmarks ohne auskommen
+    from tile_fetcher import TileFetcher, tile_subdomain
+
+    factor = 2.0 ** args.zoom
+    cx, cy = (value * factor for value in mercator(52.5200, 13.4050))
+    views = (("kalt", cx), ("Schwenk", cx + args.width))
+    print(f"Zoom {args.zoom}, {args.width}x{args.height}, Verbindungsaufbau {args.handshake * 1e3:.0f} ms,"
+          f" Anfrage {args.latency * 1e3:.0f} ms, {args.workers} Threads")
+    print(f"{'':>14} {'Viewport':>9} {'Kacheln':>8} {'erste (ms)':>11} {'voll (ms)':>10} {'Verbindungen':>13}")
+    with StandInTileServer(handshake=args.handshake, latency=args.latency, size=args.size) as server:
+        for name, make in (("requests.get", lambda: lambda url: requests.get(url, timeout=5)),
+                           ("TileFetcher", lambda: TileFetcher().get)):
+            fetch = make()
+            with ThreadPoolExecutor(max_workers=args.workers) as pool:
+                for label, x in views:
+                    tiles = sorted(visible_tiles(x, cy, args.width, args.height))
+                    server.reset()
+                    start = time.perf_counter()
+
+                    def load(tile):
+                        tile_x, tile_y = tile
+                        s = tile_subdomain(server.subdomains, tile_x, tile_y)
+                        response = fetch(server.url.format(z=args.zoom, x=tile_x, y=tile_y, s=s))
+                        response.raise_for_status()
+                        assert len(response.content) == args.size
+                        return time.perf_counter() - start
+
+                    done = sorted(pool.map(load, tiles))
+                    print(f"{name:>14} {label:>9} {len(tiles):>8} {done[0] * 1e3:>11.0f} {done[-1] * 1e3:>10.0f}"
+                          f" {server.connections:>13}")
+
+
+class BenchTile:
+    # was TileQueue von mapviews Tile braucht
+    __slots__ = ("tile_x", "tile_y", "zoom", "state")
+
+    def __init__(self, tile_x, tile_y, zoom):
+        self.tile_x = tile_x
+        self.tile_y = tile_y
+        self.zoom = zoom
+        self.state = "loading"
+
+
+def bench_tilequeue(args):
+    # Schnelles Wischen schräg über die Karte. Die Karte verhält sich wie
+    # MapView.load_visible_tiles: neue Kacheln von der Mitte aus anfordern,
+    # aus dem Bild gefallene auf "done" setzen. Der Download ist simuliert
+    # (args.latency pro Kachel). Gemessen ab dem letzten Schritt, bis die
+    # Mitte und bis das ganze Bild da ist; "zu spät" sind Downloads, die erst
+    # fertig wurden, als die Kachel schon aus dem Bild war, "verworfen"
+    # Kacheln, die ohne Download übersprungen wurden.
+    factor = 2.0 ** args.zoom
+    cx, cy = (value * factor for value in mercator(52.5200, 13.4050))
+    views = [(cx + i * args.width * args.pan, cy + i * args.height * args.pan / 2) for i in range(args.steps)]
+    print(f"{args.steps} Schwenks um {args.pan:.0%} der Bildbreite alle {args.interval * 1e3:.0f} ms;"
+          f" {args.workers} Threads, {args.latency * 1e3:.0f} ms pro Kachel")
+    print(f"{'':>10} {'Mitte (ms)':>11} {'voll (ms)':>10} {'geladen':>8} {'zu spät':>8} {'verworfen':>10}")
+    for name in ("FIFO", "TileQueue"):
+        queue = TileQueue()
+        loaded = {}
+        wasted = []
+        skipped = []
+        lock = threading.Lock()
+
+        def load(tile):
+            if tile is None:
+                return
+            if tile.state == "done":
+                skipped.append(tile)
+                return
+            time.sleep(args.latency)
+            with lock:
+                loaded[tile] = time.perf_counter()
+                if tile.state == "done":
+                    wasted.append(tile)
+            tile.state = "loaded"
+
+        pending = {}
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            for x, y in views:
+                wanted = visible_tiles(x, y, args.width, args.height)
+                for key, tile in list(pending.items()):
+                    if key not in wanted:
+                        if tile.state != "loaded":
+                            tile.state = "done"
+                        del pending[key]
+                center = (x / TILE_SIZE, y / TILE_SIZE)
+                queue.set_view(args.zoom, *center)
+                new = sorted((key for key in wanted if key not in pending),
+                             key=lambda k: (k[0] + 0.5 - center[0]) ** 2 + (k[1] + 0.5 - center[1]) ** 2)
+                for key in new:
+                    tile = pending[key] = BenchTile(key[0], key[1], args.zoom)
+                    if name == "FIFO":
+                        pool.submit(load, tile)
+                    else:
+                        queue.push(tile)
+                        pool.submit(lambda: load(queue.pop()))
+                start = time.perf_counter()
+                time.sleep(args.interval)
+            middle = pending[(int(center[0]), int(center[1]))]
+        full = max(loaded[tile] for tile in pending.values()) - start
+        print(f"{name:>10} {max(loaded[middle] - start, 0) * 1e3:>11.0f} {max(full, 0) * 1e3:>10.0f}"
+              f" {len(loaded):>8} {len(wasted):>8} {len(skipped) + queue.cancelled:>10}")
+
+
+def poll_futures(futures, cap_time):
+    # wie Downloader._check_executor, ein Tick der 60-Hz-Abfrage
+    start = time.time()
+    try:
+        for future in as_completed(futures[:], 0):
+            futures.remove(future)
+            result = future.result()
+            if result is None:
+                continue
+            callback, args = result
+            callback(*args)
+            if time.time() - start > cap_time:
+                break
+    except TimeoutError:
+        pass
+
+
+def bench_delivery(args):
+    # Zustellung fertiger Downloads an den UI-Thread: 60-Hz-Abfrage der
+    # Futures wie in mapview gegen die CompletionQueue. CPU im UI-Thread pro
+    # Sekunde ohne Downloads und mit offenen Downloads (Backlog), dazu die
+    # Zeit, einen Schwall fertiger Downloads auszuliefern.
+    cap_time = 0.064
+    delivered = []
+    result = (delivered.append, (None,))
+    print(f"{'':>16} {'leer (ms/s)':>12} {'Backlog (ms/s)':>15} {'Schwall (ms)':>13}")
+    for name in ("Abfrage 60 Hz", "CompletionQueue"):
+        wakes = []
+        completions = CompletionQueue(lambda: wakes.append(1))
+        futures = []
+
+        def add(future):
+            if name == "CompletionQueue":
+                completions.watch(future)
+            else:
+                futures.append(future)
+
+        def frames(seconds):
+            # CPU im UI-Thread für seconds Sekunden bei 60 Frames/s
+            start = time.process_time()
+            for _ in range(int(seconds * 60)):
+                if name == "CompletionQueue":
+                    # der Trigger ruft drain nur, wenn etwas fertig wurde
+                    if wakes:
+                        wakes.clear()
+                        completions.drain(cap_time)
+                else:
+                    poll_futures(futures, cap_time)
+            return (time.process_time() - start) / seconds
+
+        idle = frames(args.seconds)
+        pending = [Future() for _ in range(args.backlog)]
+        for future in pending:
+            add(future)
+        backlog = frames(args.seconds)
+        delivered.clear()
+        start = time.perf_counter()
+        for future in pending:
+            future.set_result(result)
+        while len(delivered) < args.backlog:
+            frames(1 / 60)
+        burst = time.perf_counter() - start
+        print(f"{name:>16} {idle * 1e3:>12.2f} {backlog * 1e3:>15.1f} {burst * 1e3:>13.1f}")
+
+
+def bench_tilecache(args):
+    # Kachel-Cache: eine Datei pro Kachel gegen die SQLite-Datenbank. Schreiben,
+    # Treffer und Fehlschläge in µs pro Kachel, Platz auf der Platte; danach
+    # die Datenbank mit einem Budget von args.budget Kacheln (LRU-Aufräumen im
+    # Hintergrund) und die Übernahme eines alten Cache-Verzeichnisses.
+    rnd = random.Random(args.seed)
+    payload = bytes(rnd.getrandbits(8) for _ in range(args.size))
+    keys = [("osm", 15, 17600 + i % 64, 21400 + i // 64) for i in range(args.tiles)]
+    misses = [("osm", 16, x, y) for _, _, x, y in keys]
+    lookups = [rnd.choice(keys) for _ in range(args.lookups)]
+
+    def disk_usage(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+    print(f"{args.tiles} Kacheln zu {args.size} Bytes")
+    print(f"{'':>10} {'Schreiben (µs)':>15} {'Treffer (µs)':>13} {'Fehlschlag (µs)':>16} {'Platte (MB)':>12}")
+    for name in ("Dateien", "SQLite"):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache")
+            if name == "SQLite":
+                cache = SqliteTileCache(os.path.join(path, "tiles.mbtiles"), budget=args.tiles * args.size * 2)
+            else:
+                cache = DirectoryTileCache(path)
+            start = time.perf_counter()
+            for key in keys:
+                cache.put(key, payload)
+            put = (time.perf_counter() - start) / len(keys)
+            start = time.perf_counter()
+            for key in lookups:
+                assert len(cache.get(key)) == args.size
+            hit = (time.perf_counter() - start) / len(lookups)
+            start = time.perf_counter()
+            for key in misses:
+                assert cache.get(key) is None
+            miss = (time.perf_counter() - start) / len(misses)
+            cache.close()
+            print(f"{name:>10} {put * 1e6:>15.1f} {hit * 1e6:>13.1f} {miss * 1e6:>16.1f} {disk_usage(path) / 1e6:>12.1f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old = DirectoryTileCache(tmp)
+        for key in keys:
+            old.put(key, payload)
+        cache = SqliteTileCache(os.path.join(tmp, "tiles.mbtiles"), budget=args.budget * args.size)
+        start = time.perf_counter()
+        imported = cache.import_directory(tmp)
+        duration = time.perf_counter() - start
+        left = sum(1 for name in os.listdir(tmp) if not name.startswith("tiles.mbtiles"))
+        print(f"Übernahme von {imported} Dateien: {duration * 1e3:.0f} ms, übrig {left} Dateien")
+        # Kacheln der zweiten Hälfte gelten als zuletzt benutzt und müssen bleiben
+        recent = keys[len(keys) // 2:][-int(args.budget * 0.8):]
+        for key in recent:
+            cache.get(key)
+        cache.wakeup.set()
+        start = time.perf_counter()
+        while cache.size > args.budget * args.size:
+            time.sleep(0.001)
+        duration = time.perf_counter() - start
+        cache.close()
+        kept = sum(1 for key in recent if cache.get(key) is not None)
+        print(f"Budget {args.budget} Kacheln: {cache.size // args.size} Kacheln nach {duration * 1e3:.0f} ms im"
+              f" Hintergrund, zuletzt benutzte behalten {kept}/{len(recent)}")
+
+
+class BenchTexture:
+    # was TextureCache von einer Kivy-Textur braucht
+    __slots__ = ("width", "height")
+
+    def __init__(self, width=TILE_SIZE, height=TILE_SIZE):
+        self.width = width
+        self.height = height
+
+
+def bench_texturecache(args):
+    # Hin- und Herschieben der Karte um eine Bildschirmbreite, args.swipes
+    # Mal, mit Ausreißern nach oben und unten. Pro Budget des TextureCache:
+    # wie viele neu sichtbare Kacheln ohne Datenbank und Dekodieren sofort da
+    # sind und was ein Fehlschlag mindestens kostet (nur SQLite-Lesen, das
+    # PNG-Dekodieren braucht Kivy und kommt noch dazu).
+    rnd = random.Random(args.seed)
+    factor = 2.0 ** args.zoom
+    cx, cy = (value * factor for value in mercator(52.5200, 13.4050))
+    views = [(cx + (i % 2) * args.width, cy + rnd.choice((-1, 0, 0, 1)) * args.height / 2)
+             for i in range(args.swipes)]
+    payload = bytes(rnd.getrandbits(8) for _ in range(args.size))
+    print(f"{args.swipes} Schwenks um eine Bildbreite, {args.width}x{args.height}")
+    print(f"{'Budget (MB)':>12} {'Kacheln':>8} {'sofort':>8} {'aus DB':>8} {'Textur (MB)':>12} {'Treffer (µs)':>13}"
+          f" {'DB (µs)':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SqliteTileCache(os.path.join(tmp, "tiles.mbtiles"))
+        for x, y in views:
+            for tile_x, tile_y in visible_tiles(x, y, args.width, args.height):
+                cache.put(("osm", args.zoom, tile_x, tile_y), payload)
+        for budget in args.budgets:
+            textures = TextureCache(budget * 1024 * 1024)
+            shown = set()
+            total = 0
+            hit_time = read_time = 0.0
+            for x, y in views:
+                visible = visible_tiles(x, y, args.width, args.height)
+                for tile_x, tile_y in visible - shown:
+                    key = ("osm", args.zoom, tile_x, tile_y)
+                    total += 1
+                    start = time.perf_counter()
+                    texture = textures.get(key)
+                    if texture is not None:
+                        hit_time += time.perf_counter() - start
+                        continue
+                    start = time.perf_counter()
+                    assert cache.get(key) is not None
+                    read_time += time.perf_counter() - start
+                    textures.put(key, BenchTexture())
+                shown = visible
+            hits = textures.hits
+            print(f"{budget:>12} {total:>8} {hits:>8} {textures.misses:>8} {textures.size / 2 ** 20:>12.1f}"
+                  f" {hit_time / max(hits, 1) * 1e6:>13.2f} {read_time / max(textures.misses, 1) * 1e6:>8.1f}")
+        cache.close()
+
+
+def bench_seek(args):
+    rnd = random.Random(args.seed)
+    print(f"{'Punkte':>10} {'Öffnen (ms)':>12} {'Seek (µs)':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, "track.trk")
+            write_mapped_track(path, synthetic_track(size, seed=args.seed))
+
+            start = time.perf_counter()
+            track = MappedTrack(path)
+            opened = time.perf_counter() - start
+
+            first = track.timestamp[0]
+            targets = [first + rnd.uniform(0, size - 1) for _ in range(args.seeks)]
+            start = time.perf_counter()
+            for target in targets:
+                position = track.seek_time(target)
+                track[position]
+            seek = (time.perf_counter() - start) / args.seeks
+            assert track.seek_time(first + size // 2) == size // 2
+            track.close()
+            print(f"{size:>10} {opened * 1e3:>12.3f} {seek * 1e6:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks für den Bike Tracker")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    render = sub.add_parser("render", help="Kosten pro Fix beim Zeichnen der Track-Linie")
+    render.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000, 1000000])
+    render.add_argument("--fixes", type=int, default=2000)
+    render.add_argument("--seed", type=int, default=1)
+    render.set_defaults(func=bench_render)
+
+    pan = sub.add_parser("pan", help="Kosten pro Frame beim Verschieben der Karte")
+    pan.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 500000])
+    pan.add_argument("--frames", type=int, default=10000)
+    pan.add_argument("--seed", type=int, default=1)
+    pan.set_defaults(func=bench_pan)
+
+    lod = sub.add_parser("lod", help="Vertices pro Zoomstufe nach Vereinfachung")
+    lod.add_argument("--points", type=int, default=100000)
+    lod.add_argument("--zooms", type=int, nargs="+", default=[8, 10, 12, 14, 16, 18, 19])
+    lod.add_argument("--seed", type=int, default=1)
+    lod.set_defaults(func=bench_lod)
+
+    cull = sub.add_parser("cull", help="gezeichnete Vertices bei Viewport-Culling")
+    cull.add_argument("--km", type=float, default=200)
+    cull.add_argument("--zooms", type=int, nargs="+", default=[12, 14, 16, 17, 18, 19])
+    cull.add_argument("--seed", type=int, default=1)
+    cull.set_defaults(func=bench_cull)
+
+    memory = sub.add_parser("memory", help="Speicherbedarf des TrackStore")
+    memory.add_argument("--points", type=int, default=1000000)
+    memory.add_argument("--seed", type=int, default=1)
+    memory.set_defaults(func=bench_memory)
+
+    fmt = sub.add_parser("format", help="Dateigröße und Ladezeit JSON gegen Format v2/v3")
+    fmt.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    fmt.add_argument("--seed", type=int, default=1)
+    fmt.set_defaults(func=bench_format)
+
+    load = sub.add_parser("load", help="Übernahme eines geladenen Tracks: einzeln gegen Block")
+    load.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    load.add_argument("--zoom", type=int, default=14)
+    load.add_argument("--seed", type=int, default=1)
+    load.set_defaults(func=bench_load)
+
+    follow = sub.add_parser("follow", help="Kachel-Umbau pro Fix: center_on gegen Folgekamera")
+    follow.add_argument("--fixes", type=int, default=3600)
+    follow.add_argument("--zoom", type=int, default=16)
+    follow.add_argument("--width", type=int, default=1080)
+    follow.add_argument("--height", type=int, default=1920)
+    follow.add_argument("--fps", type=int, default=60)
+    follow.add_argument("--seed", type=int, default=1)
+    follow.set_defaults(func=bench_follow)
+
+    ingest = sub.add_parser("ingest", help="Fix-Durchsatz der TrackingEngine ohne Fenster")
+    ingest.add_argument("--fixes", type=int, default=1000000)
+    ingest.add_argument("--seed", type=int, default=1)
+    ingest.set_defaults(func=bench_ingest)
+
+    distance = sub.add_parser("distance", help="Distanzberechnung: Genauigkeit und Kosten")
+    distance.add_argument("--points", type=int, default=100000)
+    distance.add_argument("--seed", type=int, default=1)
+    distance.set_defaults(func=bench_distance)
+
+    filt = sub.add_parser("filter", help="FixFilter: Punktzahl, Abweichung und Distanz")
+    filt.add_argument("--seconds", type=int, default=3600)
+    filt.add_argument("--rates", type=float, nargs="+", default=[1, 5])
+    filt.add_argument("--seed", type=int, default=1)
+    filt.set_defaults(func=bench_filter)
+
+    stats = sub.add_parser("stats", help="gleitende Fahrtstatistik aus RideStats")
+    stats.add_argument("--seconds", type=int, default=3600)
+    stats.add_argument("--rate", type=float, default=1)
+    stats.add_argument("--seed", type=int, default=1)
+    stats.set_defaults(func=bench_stats)
+
+    replay = sub.add_parser("replay", help="Track abspielen: Kosten pro Fix von Aufnahme bis Geometrie")
+    replay.add_argument("--path", help="Track (.trk, .json, .gpx), sonst eine synthetische Fahrt")
+    replay.add_argument("--seconds", type=int, default=3600)
+    replay.add_argument("--rate", type=float, default=5)
+    replay.add_argument("--zoom", type=int, default=16)
+    replay.add_argument("--seed", type=int, default=1)
+    replay.add_argument("--json", action="store_true", help="Bericht als JSON")
+    replay.set_defaults(func=bench_replay)
+
+    stress = sub.add_parser("stress", help="Dauerlast mit synthetischer Fahrt bei hoher Fix-Rate")
+    stress.add_argument("--rates", type=float, nargs="+", default=[10, 50, 100])
+    stress.add_argument("--hours", type=float, default=1)
+    stress.add_argument("--checkpoint", type=float, default=600, help="Sekunden Fahrt zwischen Speichermessungen")
+    stress.add_argument("--zoom", type=int, default=16)
+    stress.add_argument("--seed", type=int, default=1)
+    stress.add_argument("--no-filter", action="store_true")
+    stress.add_argument("--no-journal", action="store_true")
+    stress.add_argument("--report", help="JSON-Bericht in diese Datei")
+    stress.set_defaults(func=bench_stress)
+
+    nmea = sub.add_parser("nmea", help="NMEA-Parser: CPU pro Fix, optional über TCP")
+    nmea.add_argument("--seconds", type=int, default=3600)
+    nmea.add_argument("--rate", type=float, default=10)
+    nmea.add_argument("--chunk", type=int, default=64, help="Bytes pro Lesevorgang")
+    nmea.add_argument("--corrupt", type=float, default=0.0, help="Anteil beschädigter Sätze")
+    nmea.add_argument("--tcp", action="store_true", help="zusätzlich über eine lokale TCP-Verbindung")
+    nmea.add_argument("--seed", type=int, default=1)
+    nmea.set_defaults(func=bench_nmea)
+
+    tiles = sub.add_parser("tiles", help="Kacheldownload: requests.get pro Kachel gegen gehaltene Verbindungen")
+    tiles.add_argument("--zoom", type=int, default=15)
+    tiles.add_argument("--width", type=int, default=1080)
+    tiles.add_argument("--height", type=int, default=1920)
+    tiles.add_argument("--workers", type=int, default=5)
+    tiles.add_argument("--handshake", type=float, default=0.06, help="Sekunden für TCP + TLS")
+    tiles.add_argument("--latency", type=float, default=0.03, help="Sekunden pro Anfrage")
+    tiles.add_argument("--size", type=int, default=20000, help="Bytes pro Kachel")
+    tiles.set_defaults(func=bench_tiles)
+
+    tilequeue = sub.add_parser("tilequeue", help="Reihenfolge der Kacheldownloads nach schnellem Schwenken und Zoomen")
+    tilequeue.add_argument("--zoom", type=int, default=15)
+    tilequeue.add_argument("--width", type=int, default=1080)
+    tilequeue.add_argument("--height", type=int, default=1920)
+    tilequeue.add_argument("--steps", type=int, default=20)
+    tilequeue.add_argument("--pan", type=float, default=0.25, help="Anteil der Bildbreite pro Schritt")
+    tilequeue.add_argument("--interval", type=float, default=0.1, help="Sekunden zwischen zwei Schritten")
+    tilequeue.add_argument("--workers", type=int, default=5)
+    tilequeue.add_argument("--latency", type=float, default=0.05, help="Sekunden pro Kachel")
+    tilequeue.set_defaults(func=bench_tilequeue)
+
+    delivery = sub.add_parser("delivery", help="Zustellung fertiger Downloads: 60-Hz-Abfrage gegen Ereignisse")
+    delivery.add_argument("--seconds", type=float, default=5)
+    delivery.add_argument("--backlog", type=int, default=300, help="offene Downloads")
+    delivery.set_defaults(func=bench_delivery)
+
+    tilecache = sub.add_parser("tilecache", help="Kachel-Cache: Dateien gegen SQLite mit LRU-Budget")
+    tilecache.add_argument("--tiles", type=int, default=2000)
+    tilecache.add_argument("--size", type=int, default=20000, help="Bytes pro Kachel")
+    tilecache.add_argument("--lookups", type=int, default=20000)
+    tilecache.add_argument("--budget", type=int, default=500, help="Kacheln im Budget beim Aufräumen")
+    tilecache.add_argument("--seed", type=int, default=1)
+    tilecache.set_defaults(func=bench_tilecache)
+
+    texturecache = sub.add_parser("texturecache", help="Texturen wieder sichtbarer Kacheln beim Hin- und Herschieben")
+    texturecache.add_argument("--zoom", type=int, default=15)
+    texturecache.add_argument("--width", type=int, default=1080)
+    texturecache.add_argument("--height", type=int, default=1920)
+    texturecache.add_argument("--swipes", type=int, default=200)
+    texturecache.add_argument("--size", type=int, default=20000, help="Bytes pro Kachel")
+    texturecache.add_argument("--budgets", type=int, nargs="+", default=[0, 16, 32, 64], help="MB Texturspeicher")
+    texturecache.add_argument("--seed", type=int, default=1)
+    texturecache.set_defaults(func=bench_texturecache)
+
+    seek = sub.add_parser("seek", help="Öffnen und Zeitsprung in per mmap gelesenen Tracks")
+    seek.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    seek.add_argument("--seeks", type=int, default=10000)
+    seek.add_argument("--seed", type=int, default=1)
+    seek.set_defaults(func=bench_seek)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
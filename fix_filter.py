@@ -0,0 +1,162 @@
+import math
+
+METERS_PER_DEGREE = 111320.0
+
+MAX_SPEED = 25.0  # m/s (90 km/h), schnellere Sprünge gelten als Ausreißer
+MAX_ACCURACY = 50.0  # m, ungenauere Fixes werden verworfen
+DEFAULT_ACCURACY = 10.0  # m, wenn die Quelle keine Genauigkeit liefert
+REACQUIRE_AFTER = 5  # so viele Ausreißer in Folge: neu aufsetzen statt weiter verwerfen
+PROCESS_NOISE = 0.5  # Beschleunigungsrauschen in m²/s³
+MIN_SPACING = 3.0  # m, näher am zuletzt ausgegebenen Punkt wird nichts ausgegeben
+STATIONARY_SPEED = 1.2  # m/s, darunter gilt der Fahrer als stehend
+STATIONARY_RADIUS = 10.0  # m, Punkte im Stand innerhalb dieses Radius entfallen
+REANCHOR_DISTANCE = 20000.0  # m, dann wird das lokale Koordinatensystem verschoben
+
+
+class _Axis:
+    # Kalman-Filter mit konstanter Geschwindigkeit für eine Achse:
+    # Zustand (Position, Geschwindigkeit), Kovarianz als 2x2 symmetrisch
+    __slots__ = ("x", "v", "p_xx", "p_xv", "p_vv")
+
+    def __init__(self, x, variance):
+        self.x = x
+        self.v = 0.0
+        self.p_xx = variance
+        self.p_xv = 0.0
+        self.p_vv = MAX_SPEED ** 2
+
+    def predict(self, dt, q):
+        self.x += self.v * dt
+        dt2 = dt * dt
+        self.p_xx += 2 * dt * self.p_xv + dt2 * self.p_vv + q * dt2 * dt / 3
+        self.p_xv += dt * self.p_vv + q * dt2 / 2
+        self.p_vv += q * dt
+
+    def update(self, z, r):
+        s = self.p_xx + r
+        k_x = self.p_xx / s
+        k_v = self.p_xv / s
+        residual = z - self.x
+        self.x += k_x * residual
+        self.v += k_v * residual
+        p_xx, p_xv = self.p_xx, self.p_xv
+        self.p_xx = (1 - k_x) * p_xx
+        self.p_xv = (1 - k_x) * p_xv
+        self.p_vv -= k_v * p_xv
+
+
+class FixFilter:
+    # Vorstufe für GPS-Fixes, O(1) pro Fix:
+    # 1. verwirft ungenaue Fixes und unplausible Sprünge (Geschwindigkeit),
+    # 2. glättet die Position mit einem Kalman-Filter (konstante Geschwindigkeit)
+    #    in einem lokalen Meter-Koordinatensystem,
+    # 3. lässt Punkte weg, die kaum Abstand zum letzten ausgegebenen haben,
+    #    im Stand (Ampel) großzügiger als in Fahrt.
+
+    def __init__(self, max_speed=MAX_SPEED, max_accuracy=MAX_ACCURACY, min_spacing=MIN_SPACING,
+                 stationary_speed=STATIONARY_SPEED, stationary_radius=STATIONARY_RADIUS,
+                 process_noise=PROCESS_NOISE):
+        self.max_speed = max_speed
+        self.max_accuracy = max_accuracy
+        self.min_spacing = min_spacing
+        self.stationary_speed = stationary_speed
+        self.stationary_radius = stationary_radius
+        self.process_noise = process_noise
+        self.received = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.reset()
+
+    def reset(self):
+        self.lat0 = None
+        self.lon0 = None
+        self.scale_x = 1.0
+        self.axis_x = None
+        self.axis_y = None
+        self.last_time = None
+        self.last_raw = None  # letzter angenommener Rohpunkt (x, y, t)
+        self.last_emitted = None  # (x, y)
+        self.outliers = 0
+
+    def _anchor(self, lat, lon):
+        self.lat0 = lat
+        self.lon0 = lon
+        self.scale_x = METERS_PER_DEGREE * math.cos(math.radians(lat))
+
+    def _local(self, lat, lon):
+        return (lon - self.lon0) * self.scale_x, (lat - self.lat0) * METERS_PER_DEGREE
+
+    def _geographic(self, x, y):
+        return self.lat0 + y / METERS_PER_DEGREE, self.lon0 + x / self.scale_x
+
+    def _start(self, lat, lon, timestamp, accuracy):
+        self._anchor(lat, lon)
+        self.axis_x = _Axis(0.0, accuracy * accuracy)
+        self.axis_y = _Axis(0.0, accuracy * accuracy)
+        self.last_time = timestamp
+        self.last_raw = (0.0, 0.0, timestamp)
+        self.last_emitted = (0.0, 0.0)
+        self.outliers = 0
+        return lat, lon
+
+    def process(self, lat, lon, timestamp, accuracy=math.nan):
+        # geglättetes (lat, lon) oder None, wenn der Fix nicht in den Track soll
+        self.received += 1
+        if accuracy != accuracy or accuracy <= 0:
+            accuracy = DEFAULT_ACCURACY
+        if accuracy > self.max_accuracy:
+            self.rejected += 1
+            return None
+        if self.axis_x is None:
+            return self._start(lat, lon, timestamp, accuracy)
+
+        dt = timestamp - self.last_time
+        if dt <= 0:
+            self.rejected += 1
+            return None
+        x, y = self._local(lat, lon)
+        raw_x, raw_y, raw_time = self.last_raw
+        # erlaubte Strecke plus Messunsicherheit, damit Rauschen bei kurzem dt nicht als Sprung zählt
+        reach = self.max_speed * (timestamp - raw_time) + 2 * accuracy
+        if (x - raw_x) ** 2 + (y - raw_y) ** 2 > reach * reach:
+            self.outliers += 1
+            self.rejected += 1
+            if self.outliers < REACQUIRE_AFTER:
+                return None
+            # nicht der Fix ist falsch, sondern der Filter liegt daneben
+            self.reset()
+            return self._start(lat, lon, timestamp, accuracy)
+        self.outliers = 0
+        self.last_raw = (x, y, timestamp)
+
+        variance = accuracy * accuracy
+        q = self.process_noise
+        for axis, z in ((self.axis_x, x), (self.axis_y, y)):
+            axis.predict(dt, q)
+            axis.update(z, variance)
+        self.last_time = timestamp
+
+        fx = self.axis_x.x
+        fy = self.axis_y.x
+        emitted_x, emitted_y = self.last_emitted
+        moved = math.hypot(fx - emitted_x, fy - emitted_y)
+        speed = math.hypot(self.axis_x.v, self.axis_y.v)
+        if moved < self.min_spacing or (speed < self.stationary_speed and moved < self.stationary_radius):
+            self.dropped += 1
+            return None
+        self.last_emitted = (fx, fy)
+        result = self._geographic(fx, fy)
+        if fx * fx + fy * fy > REANCHOR_DISTANCE ** 2:
+            self._reanchor(*result)
+        return result
+
+    def _reanchor(self, lat, lon):
+        # lokales System auf den aktuellen Punkt verschieben, damit die
+        # Näherung als Ebene genau bleibt; Geschwindigkeiten bleiben gültig
+        shift_x, shift_y = self._local(lat, lon)
+        self._anchor(lat, lon)
+        self.axis_x.x -= shift_x
+        self.axis_y.x -= shift_y
+        raw_x, raw_y, raw_time = self.last_raw
+        self.last_raw = (raw_x - shift_x, raw_y - shift_y, raw_time)
+        self.last_emitted = (self.last_emitted[0] - shift_x, self.last_emitted[1] - shift_y)
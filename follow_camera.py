@@ -0,0 +1,37 @@
+import math
+
+DEAD_ZONE = 0.3  # Anteil der halben Viewport-Größe, in dem sich die Karte nicht bewegt
+SMOOTHING = 0.25  # Zeitkonstante der Kamerafahrt in Sekunden
+SETTLE_PIXELS = 0.5  # darunter gilt das Ziel als erreicht
+
+
+class FollowCamera:
+    # Führt den Viewport dem Fahrer nach, ohne bei jedem Fix neu zu
+    # zentrieren: solange der Fahrer im mittleren Bereich (Dead-Zone) bleibt,
+    # steht die Karte. Verlässt er ihn, gleitet der Viewport mit
+    # exponentieller Dämpfung auf ihn zu, bis er wieder in der Mitte ist.
+    # Alles in Kartenpixeln der aktuellen Zoomstufe, ohne Kivy.
+
+    def __init__(self, dead_zone=DEAD_ZONE, smoothing=SMOOTHING):
+        self.dead_zone = dead_zone
+        self.smoothing = smoothing
+        self.moving = False
+
+    def update(self, center, target, size, dt):
+        # Verschiebung (dx, dy) des Viewports für diesen Frame
+        offset_x = target[0] - center[0]
+        offset_y = target[1] - center[1]
+        if not self.moving:
+            if (abs(offset_x) <= self.dead_zone * size[0] / 2.0
+                    and abs(offset_y) <= self.dead_zone * size[1] / 2.0):
+                return 0.0, 0.0
+            self.moving = True
+
+        if math.hypot(offset_x, offset_y) <= SETTLE_PIXELS:
+            self.moving = False
+            return offset_x, offset_y
+        factor = 1.0 - math.exp(-dt / self.smoothing) if self.smoothing > 0 else 1.0
+        return offset_x * factor, offset_y * factor
+
+    def stop(self):
+        self.moving = False
@@ -0,0 +1,110 @@
+import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+EARTH_RADIUS_KM = 6371.0088  # mittlerer Erdradius (IUGG)
+WGS84_A = 6378.137  # große Halbachse in km
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def vincenty_km(lat1, lon1, lat2, lon2, iterations=200, tolerance=1e-12):
+    # Inverse Aufgabe auf dem WGS84-Ellipsoid, auf Millimeter genau; für
+    # fast antipodale Punkte konvergiert sie nicht, dann gilt Haversine
+    if lat1 == lat2 and lon1 == lon2:
+        return 0.0
+    u1 = math.atan((1 - WGS84_F) * math.tan(math.radians(lat1)))
+    u2 = math.atan((1 - WGS84_F) * math.tan(math.radians(lat2)))
+    sin_u1, cos_u1 = math.sin(u1), math.cos(u1)
+    sin_u2, cos_u2 = math.sin(u2), math.cos(u2)
+    big_l = math.radians(lon2 - lon1)
+    lam = big_l
+    for _ in range(iterations):
+        sin_lam, cos_lam = math.sin(lam), math.cos(lam)
+        sin_sigma = math.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+        if sin_sigma == 0:
+            return 0.0
+        cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+        sigma = math.atan2(sin_sigma, cos_sigma)
+        sin_alpha = cos_u1 * cos_u2 * sin_lam / sin_sigma
+        cos2_alpha = 1 - sin_alpha ** 2
+        cos_2sm = cos_sigma - 2 * sin_u1 * sin_u2 / cos2_alpha if cos2_alpha else 0.0
+        c = WGS84_F / 16 * cos2_alpha * (4 + WGS84_F * (4 - 3 * cos2_alpha))
+        previous = lam
+        lam = big_l + (1 - c) * WGS84_F * sin_alpha * (
+            sigma + c * sin_sigma * (cos_2sm + c * cos_sigma * (-1 + 2 * cos_2sm ** 2)))
+        if abs(lam - previous) < tolerance:
+            break
+    else:
+        return haversine_km(lat1, lon1, lat2, lon2)
+
+    u2_sq = cos2_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+    big_a = 1 + u2_sq / 16384 * (4096 + u2_sq * (-768 + u2_sq * (320 - 175 * u2_sq)))
+    big_b = u2_sq / 1024 * (256 + u2_sq * (-128 + u2_sq * (74 - 47 * u2_sq)))
+    delta_sigma = big_b * sin_sigma * (cos_2sm + big_b / 4 * (
+        cos_sigma * (-1 + 2 * cos_2sm ** 2)
+        - big_b / 6 * cos_2sm * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sm ** 2)))
+    return WGS84_B * big_a * (sigma - delta_sigma)
+
+
+class DistanceMeter:
+    # Laufende Distanz per Haversine, O(1) pro Fix: der letzte Punkt wird in
+    # Bogenmaß samt cos(lat) gehalten, pro Schritt fällt nur ein cos an.
+    __slots__ = ("total", "phi", "lam", "cos_phi")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.total = 0.0  # km
+        self.phi = None
+        self.lam = None
+        self.cos_phi = None
+
+    def add(self, lat, lon):
+        # Länge des neuen Segments in km
+        phi = math.radians(lat)
+        lam = math.radians(lon)
+        cos_phi = math.cos(phi)
+        segment = 0.0
+        if self.phi is not None:
+            a = (math.sin((phi - self.phi) / 2) ** 2
+                 + self.cos_phi * cos_phi * math.sin((lam - self.lam) / 2) ** 2)
+            segment = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+            self.total += segment
+        self.phi = phi
+        self.lam = lam
+        self.cos_phi = cos_phi
+        return segment
+
+
+def track_distance_km(lats, lons):
+    # Gesamtlänge eines Tracks (Listen, arrays oder memoryviews), mit NumPy
+    # vektorisiert, sonst in einem Durchlauf mit math
+    count = len(lats)
+    if count < 2:
+        return 0.0
+    if numpy is not None:
+        phi = numpy.radians(numpy.asarray(lats, dtype=numpy.float64))
+        lam = numpy.radians(numpy.asarray(lons, dtype=numpy.float64))
+        cos_phi = numpy.cos(phi)
+        a = (numpy.sin(numpy.diff(phi) / 2) ** 2
+             + cos_phi[:-1] * cos_phi[1:] * numpy.sin(numpy.diff(lam) / 2) ** 2)
+        return float(2 * EARTH_RADIUS_KM * numpy.arcsin(numpy.sqrt(numpy.minimum(a, 1.0))).sum())
+
+    meter = DistanceMeter()
+    add = meter.add
+    for lat, lon in zip(lats, lons):
+        add(lat, lon)
+    return meter.total
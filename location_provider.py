@@ -0,0 +1,26 @@
+class LocationProvider:
+    # Gemeinsame Schnittstelle der Positionsquellen, angelehnt an plyer.gps:
+    # configure(on_location=..., on_status=...), start(), stop().
+    # on_location bekommt Schlüsselwörter: lat, lon und, soweit die Quelle sie
+    # kennt, timestamp (Sekunden seit Epoch, UTC), accuracy (m), altitude (m),
+    # speed (m/s), bearing (Grad), hdop. on_status(art, text) wie bei plyer,
+    # z.B. ("provider-error", "...").
+
+    def __init__(self):
+        self.on_location = None
+        self.on_status = None
+
+    def configure(self, on_location, on_status=None):
+        self.on_location = on_location
+        self.on_status = on_status
+
+    # Quellen ohne eigenen Ablauf brauchen start()/stop() nicht zu überschreiben
+    def start(self, minTime=1000, minDistance=0):
+        pass
+
+    def stop(self):
+        pass
+
+    def status(self, kind, message):
+        if self.on_status:
+            self.on_status(kind, message)
@@ -1,50 +1,119 @@
 import sys
-import json
 import os
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
 from kivy.clock import Clock
 from kivy_garden.mapview import MapView, MapMarkerPopup
-from kivy.graphics import Color, Line
-from kivy.properties import ListProperty, NumericProperty, StringProperty, BooleanProperty, ObjectProperty
+from kivy.properties import NumericProperty, StringProperty, BooleanProperty, ObjectProperty
 from kivy.uix.popup import Popup
 from kivy.uix.filechooser import FileChooserListView
 from kivy.uix.button import Button
 from kivy.uix.label import Label
+from kivy.utils import platform
+
+from fix_filter import FixFilter
+from follow_camera import FollowCamera
+from geodesy import track_distance_km
+from nmea_provider import NmeaProvider
+from replay_provider import ReplayProvider
+from ride_journal import RideJournal
+from synthetic_ride import SyntheticRide
+from tile_downloader import TileDownloader
+from tile_queue import view_center
+from track_format import MappedTrack, read_track, write_mapped_track
+from track_layer import TrackLayer  # wird in bike.kv verwendet
+from track_store import NAN
+from tracking_engine import TrackingEngine
 
 try:
     from plyer import gps
 except ImportError:
     gps = None
 
+UI_REFRESH_RATE = 10  # Hz, 0 = einmal pro Frame
+LOAD_BATCH = 512  # Punkte pro Schritt beim Einlesen eines geladenen Tracks in die Karte
+LOAD_FRAME_BUDGET = 0.008  # Sekunden pro Frame dafür, der Rest läuft im nächsten Frame
+TIMER_SLACK = 0.02  # Sekunden nach dem Umspringen der Fahrtdauer, gegen zu frühes Feuern
+REPLAY_ENV = "BIKE_REPLAY"  # Pfad eines Tracks (.trk, .json, .gpx), der statt GPS abgespielt wird
+REPLAY_SPEED_ENV = "BIKE_REPLAY_SPEED"  # Zeitraffer 1-1000 oder "max", Standard 1
+MOCK_RATE_ENV = "BIKE_MOCK_RATE"  # Hz des Mock-GPS; gesetzt auch außerhalb von macOS
+MOCK_RATE = 1.0  # Hz, wenn nichts gesetzt ist
+NMEA_ENV = "BIKE_NMEA"  # NMEA-Quelle: Gerät, Datei, tcp://host:port oder gpsd://host[:port]
+NMEA_DEFAULT = "gpsd://localhost"  # unter Linux (Desktop), wo plyer kein GPS hat
+
 
 class MainLayout(BoxLayout):
-    track_points = ListProperty([])
-    distance = NumericProperty(0.0)
-    speed = NumericProperty(0.0)  # km/h
+    has_track = BooleanProperty(False)  # ändert sich nur beim ersten Punkt bzw. Reset
     status_text = StringProperty("")
-    ride_duration = NumericProperty(0)  # Sekunden
     gps_started = BooleanProperty(False)  # WICHTIG: als Property!
     mock_event = ObjectProperty(None, allownone=True)
     timer_event = ObjectProperty(None, allownone=True)
+    load_event = ObjectProperty(None, allownone=True)
+    camera_event = ObjectProperty(None, allownone=True)
+    replay_event = ObjectProperty(None, allownone=True)
+    ui_refresh_rate = NumericProperty(UI_REFRESH_RATE)
+    # Fahrtstatistik aus engine.stats, für Bindungen in bike.kv; gesetzt mit _render
+    speed_5s = NumericProperty(0)  # km/h
+    speed_30s = NumericProperty(0)  # km/h
+    speed_5min = NumericProperty(0)  # km/h
+    average_speed = NumericProperty(0)  # km/h in Bewegung
+    max_speed = NumericProperty(0)  # km/h
+    pace = NumericProperty(0)  # min/km
+    moving_time = NumericProperty(0)  # Sekunden
 
     def __init__(self, **kwargs):
+        # Speichern, Laden und das fsync des Journals laufen nacheinander im
+        # Hintergrund, nie im UI-Thread
+        self.worker = ThreadPoolExecutor(max_workers=1)
+        # die Fahrt selbst steckt in der Engine, das Layout beobachtet sie nur
+        self.engine = TrackingEngine(
+            RideJournal(os.path.join(os.getcwd(), "tracks", "ride.journal"), executor=self.worker),
+            FixFilter(),
+        )
+        self.engine.bind(self.on_engine_event)
+        # Fixes und Timer ändern nur das Modell und merken sich, was neu zu
+        # zeichnen ist; _render übernimmt das höchstens mit ui_refresh_rate
+        self.ui_dirty = set()
+        self.render_trigger = self._create_render_trigger(UI_REFRESH_RATE)
         super().__init__(**kwargs)
-        self.last_lat = None
-        self.last_lon = None
-        self.last_time = None
-        self.track_line = None
         self.start_marker = None
         self.end_marker = None
-        self.track_saved = True
+        self.loaded_path = None
+        self.camera = FollowCamera()
+        self.follow_target = None
+        self.replay = self._create_replay()
+        self.nmea = self._create_nmea()
+        self.replay_stats = None  # (Start, Zeit in pump, Zeit in _render) für den Bericht
+        self.mock_ride = None
+        self.mock_fixes = None
+        self.mock_count = 0  # gelieferte Fixes der laufenden Mock-Fahrt
+        self.mock_started = 0.0  # time.monotonic(), zu dem Fix 0 fällig war
+
+    @staticmethod
+    def _create_replay():
+        path = os.environ.get(REPLAY_ENV)
+        if not path:
+            return None
+        speed = os.environ.get(REPLAY_SPEED_ENV, "1")
+        return ReplayProvider.from_file(path, speed=0 if speed == "max" else float(speed))
+
+    @staticmethod
+    def _create_nmea():
+        source = os.environ.get(NMEA_ENV)
+        if not source and platform == "linux" and MOCK_RATE_ENV not in os.environ:
+            source = NMEA_DEFAULT
+        return NmeaProvider(source) if source else None
 
     def start_tracking(self):
         if self.gps_started or self.mock_event:
             self.status_text = "Tracking läuft bereits"
             return
-        self.reset_tracking()
-        self.track_saved = False
+        self.engine.start()
+        if self.replay:
+            self.replay.rewind()
+        self.mock_ride = None
         self._start_gps()
         self.ids.pause_resume_btn.text = "⏸ Pause"
         self.ids.pause_resume_btn.disabled = False
@@ -53,10 +122,17 @@ class MainLayout(BoxLayout):
         self.start_timer()
 
     def _start_gps(self):
-        if sys.platform == "darwin":
-            self.status_text = "macOS erkannt – Mock GPS aktiviert"
+        if self.replay:
+            self._start_replay()
+        elif self.nmea:
+            self.nmea.configure(on_location=self._on_location_from_thread, on_status=self._on_gps_status)
+            self.nmea.start()
+            self.gps_started = True
+            self.status_text = f"Verbinde mit {self.nmea.source}..."
+        elif sys.platform == "darwin" or MOCK_RATE_ENV in os.environ:
+            self.status_text = "Mock GPS aktiviert"
             if not self.mock_event:
-                self.mock_event = Clock.schedule_interval(self.mock_gps_update, 5)
+                self._start_mock()
                 print("Mock GPS gestartet")
             self.gps_started = True
         else:
@@ -76,15 +152,28 @@ class MainLayout(BoxLayout):
     def pause_or_resume_tracking(self):
         if self.gps_started or self.mock_event:
             self._pause_gps()
+            self.engine.pause()
             self.ids.pause_resume_btn.text = "▶ Fortsetzen"
             self.stop_timer()
         else:
+            self.engine.resume()
             self._start_gps()
             self.ids.pause_resume_btn.text = "⏸ Pause"
             self.start_timer()
 
     def _pause_gps(self):
-        if sys.platform == "darwin":
+        if self.replay:
+            if self.replay_event:
+                self.replay_event.cancel()
+                self.replay_event = None
+            self.replay.stop()
+            self.gps_started = False
+            self.status_text = "Replay pausiert"
+        elif self.nmea:
+            self.nmea.stop()
+            self.gps_started = False
+            self.status_text = "GPS pausiert"
+        elif sys.platform == "darwin" or MOCK_RATE_ENV in os.environ:
             if self.mock_event:
                 self.mock_event.cancel()
                 self.mock_event = None
@@ -104,7 +193,8 @@ class MainLayout(BoxLayout):
     def stop_tracking(self):
         self._pause_gps()
         self.stop_timer()
-        if not self.track_saved and self.track_points:
+        self.engine.stop()
+        if not self.engine.saved and self.engine.track:
             self.status_text = "Achtung: Track wurde noch nicht gespeichert!"
         else:
             self.reset_tracking()
@@ -115,20 +205,33 @@ class MainLayout(BoxLayout):
             self.status_text = "Tracking gestoppt und zurückgesetzt"
 
     def reset_tracking(self):
-        self.distance = 0.0
-        self.speed = 0.0
-        self.ride_duration = 0
-        self.last_lat = None
-        self.last_lon = None
-        self.last_time = None
-        self.track_points = []
-        self.track_saved = True
+        self.engine.reset()
         self.status_text = "Tracking zurückgesetzt"
 
+    def on_engine_event(self, event, engine):
+        if event == "fix":
+            self.has_track = True
+            self.request_render("fix")
+        elif event == "tick":
+            self.request_render("duration")
+        elif event == "reset":
+            self._reset_view()
+        elif event == "loaded":
+            self.has_track = bool(engine.track)
+
+    def _reset_view(self):
+        self.has_track = False
+        if self.load_event:
+            self.load_event.cancel()
+            self.load_event = None
+        self._stop_camera()
+
+        self.ui_dirty.clear()
         self.ids.distance_label.text = "Distanz: 0.0 km"
         self.ids.coords_label.text = "Latitude: - , Longitude: -"
         self.ids.speed_label.text = "Geschwindigkeit: 0.0 km/h"
         self.ids.duration_label.text = "Fahrtdauer: 00:00:00"
+        self._update_stats()
 
         mapview = self.ids.mapview
         mapview.center_on(52.5200, 13.4050)
@@ -141,9 +244,7 @@ class MainLayout(BoxLayout):
             mapview.remove_widget(self.end_marker)
             self.end_marker = None
 
-        if self.track_line:
-            mapview.canvas.remove(self.track_line)
-            self.track_line = None
+        self.ids.track_layer.clear()
 
         if self.timer_event:
             self.timer_event.cancel()
@@ -151,35 +252,102 @@ class MainLayout(BoxLayout):
 
         print("Tracking und Marker zurückgesetzt")
 
-    def on_location(self, **kwargs):
-        lat = float(kwargs.get("lat", 0))
-        lon = float(kwargs.get("lon", 0))
-        now = datetime.now()
+    def _start_replay(self):
+        replay = self.replay
+        replay.configure(on_location=self.on_location)
+        replay.start()
+        if replay.position == 0:
+            self.replay_stats = [time.perf_counter(), 0.0, 0.0]
+        if not self.replay_event:
+            self.replay_event = Clock.schedule_interval(self._pump_replay, 0)
+        self.gps_started = True
+        speed = f"{replay.speed:g}x" if replay.speed else "max"
+        self.status_text = f"Replay ({speed}): {len(replay)} Punkte"
+
+    def _pump_replay(self, dt):
+        start = time.perf_counter()
+        self.replay.pump()
+        self.replay_stats[1] += time.perf_counter() - start
+        if not self.replay.finished:
+            return
+        self.replay_event.cancel()
+        self.replay_event = None
+        # Kosten pro Fix für Vergleiche zwischen Versionen; die Fixes selbst
+        # sind bei jedem Lauf dieselben
+        count = len(self.replay)
+        if not count:
+            self.status_text = "Replay fertig: Track ohne Fixes"
+            return
+        began, busy, drawing = self.replay_stats
+        self.status_text = (f"Replay fertig: {count} Fixes in {time.perf_counter() - began:.1f} s, "
+                            f"{busy / count * 1e6:.0f} µs/Fix Aufnahme, {drawing / count * 1e6:.0f} µs/Fix Zeichnen")
+        print(self.status_text)
+
+    def _on_location_from_thread(self, **kwargs):
+        # Quellen mit eigenem Lesethread (NMEA): weiter im UI-Thread
+        Clock.schedule_once(lambda dt: self.on_location(**kwargs))
+
+    def _on_gps_status(self, kind, message):
+        Clock.schedule_once(lambda dt: self._show_gps_status(kind, message))
+
+    def _show_gps_status(self, kind, message):
+        self.status_text = message
+        if kind in ("provider-disabled", "provider-error"):
+            # Quelle zu Ende oder Lesefehler: der Lesethread ist weg, Start
+            # muss wieder möglich sein
+            self.gps_started = False
 
+    def on_location(self, **kwargs):
+        # Quellen mit eigener Zeit (Replay) liefern timestamp mit, plyer nicht
+        timestamp = kwargs.get("timestamp")
+        self.engine.add_fix(
+            float(kwargs.get("lat", 0)),
+            float(kwargs.get("lon", 0)),
+            float(timestamp) if timestamp is not None else time.time(),
+            float(kwargs.get("accuracy", NAN)),
+            float(kwargs.get("altitude", NAN)),
+        )
+
+    def request_render(self, *parts):
+        self.ui_dirty.update(parts)
+        self.render_trigger()
+
+    def _create_render_trigger(self, rate):
+        return Clock.create_trigger(self._render, 1.0 / rate if rate > 0 else 0)
+
+    def on_ui_refresh_rate(self, instance, rate):
+        self.render_trigger.cancel()
+        self.render_trigger = self._create_render_trigger(rate)
+        if self.ui_dirty:
+            self.render_trigger()
+
+    def _render(self, dt):
+        # egal wie viele Fixes seit dem letzten Mal kamen: gezeichnet wird einmal
+        start = time.perf_counter()
+        dirty = self.ui_dirty
+        self.ui_dirty = set()
+        if "duration" in dirty:
+            self.ids.duration_label.text = self.format_duration(self.engine.ride_duration)
+        if "fix" in dirty and self.engine.track:
+            self._render_fix()
+        if self.replay_event:
+            self.replay_stats[2] += time.perf_counter() - start
+
+    def _render_fix(self):
+        engine = self.engine
+        lat, lon = engine.track[-1]
         self.ids.coords_label.text = f"Latitude: {lat:.5f}, Longitude: {lon:.5f}"
-
-        if self.last_lat is not None and self.last_lon is not None and self.last_time is not None:
-            dist = ((lat - self.last_lat) ** 2 + (lon - self.last_lon) ** 2) ** 0.5 * 111
-            self.distance += dist
-            self.ids.distance_label.text = f"Distanz: {self.distance:.2f} km"
-
-            delta_t = (now - self.last_time).total_seconds()
-            if delta_t > 0:
-                self.speed = dist / (delta_t / 3600)
-                self.ids.speed_label.text = f"Geschwindigkeit: {self.speed:.2f} km/h"
-
-        self.last_lat = lat
-        self.last_lon = lon
-        self.last_time = now
+        self.ids.distance_label.text = f"Distanz: {engine.distance:.2f} km"
+        self.ids.speed_label.text = f"Geschwindigkeit: {engine.speed:.2f} km/h"
+        self._update_stats()
 
         mapview = self.ids.mapview
-
-        self.track_points.append((lat, lon))
-        self.track_saved = False
-
         if not self.start_marker:
-            self.start_marker = MapMarkerPopup(lat=lat, lon=lon)
+            lat_start, lon_start = engine.track[0]
+            self.start_marker = MapMarkerPopup(lat=lat_start, lon=lon_start)
             mapview.add_widget(self.start_marker)
+            # erster Fix: einmal hinspringen, danach folgt die Kamera
+            mapview.center_on(lat, lon)
 
         if not self.end_marker:
             self.end_marker = MapMarkerPopup(lat=lat, lon=lon)
@@ -187,55 +355,114 @@ class MainLayout(BoxLayout):
         else:
             self.end_marker.lat = lat
             self.end_marker.lon = lon
+            # die Karte bewegt sich nicht bei jedem Fix, der Marker schon
+            if self.end_marker._layer:
+                self.end_marker._layer.set_marker_position(mapview, self.end_marker)
 
-        mapview.center_on(lat, lon)
+        self.follow(lat, lon)
         self.draw_track_line()
 
-    def draw_track_line(self):
-        if len(self.track_points) < 2:
-            return
+    def follow(self, lat, lon):
+        self.follow_target = (lat, lon)
+        if not self.camera_event:
+            self.camera_event = Clock.schedule_interval(self._update_camera, 0)
 
+    def _update_camera(self, dt):
+        # verschiebt nur den Kartenausschnitt (trigger_update(False)):
+        # geladene Kacheln bleiben liegen, nur neu sichtbare werden geholt
         mapview = self.ids.mapview
-        points = []
-        for lat, lon in self.track_points:
-            x, y = mapview.get_window_xy_from(lat, lon, mapview.zoom)
-            points.extend([x, y])
+        map_source = mapview.map_source
+        zoom = mapview.zoom
+        scale = mapview.scale
+        lat, lon = self.follow_target
+        center = (
+            (mapview.center_x - mapview._scatter.x) / scale - mapview.delta_x,
+            (mapview.center_y - mapview._scatter.y) / scale - mapview.delta_y,
+        )
+        target = (map_source.get_x(zoom, lon), map_source.get_y(zoom, lat))
+        dx, dy = self.camera.update(center, target, (mapview.width / scale, mapview.height / scale), dt)
+        if dx or dy:
+            mapview.delta_x -= dx
+            mapview.delta_y -= dy
+            mapview.trigger_update(False)
+        if not self.camera.moving:
+            self._stop_camera()
+
+    def prioritize_tiles(self, mapview, zoom, _coord):
+        # bei jedem Update der Karte: wartende Kacheln nach der neuen
+        # Bildmitte ordnen, aus dem Bild gefallene gar nicht erst laden.
+        # _coord bleibt ungenutzt: do_update übergibt Coordinate(lon, lat),
+        # also lat und lon vertauscht; die Mitte steht kurz vorher richtig
+        # in mapview.lat/lon.
+        x, y = view_center(mapview.map_source, zoom, mapview.lat, mapview.lon)
+        TileDownloader.instance().set_view(zoom, x, y)
+
+    def _stop_camera(self):
+        self.camera.stop()
+        if self.camera_event:
+            self.camera_event.cancel()
+            self.camera_event = None
 
-        if self.track_line:
-            mapview.canvas.remove(self.track_line)
+    def draw_track_line(self):
+        if len(self.engine.track) < 2:
+            return
 
-        with mapview.canvas:
-            Color(1, 0, 0, 1)
-            self.track_line = Line(points=points, width=2)
+        # nur neue Punkte werden projiziert, Verschieben/Zoomen erledigt der Layer
+        self.ids.track_layer.update(self.engine.track)
 
     def save_track(self):
-        if not self.track_points:
+        if not self.engine.track:
             self.status_text = "Kein Track zum Speichern vorhanden."
             return
 
-        data = {
-            "date": datetime.now().isoformat(),
-            "track_points": self.track_points,
-            "distance_km": self.distance,
-            "ride_duration_sec": self.ride_duration,
-        }
+        meta = self.engine.meta()
         tracks_dir = os.path.join(os.getcwd(), "tracks")
         os.makedirs(tracks_dir, exist_ok=True)
-        filename = f"track_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        filename = f"track_{time.strftime('%Y%m%d_%H%M%S')}.trk"
         filepath = os.path.join(tracks_dir, filename)
-        try:
-            with open(filepath, 'w') as f:
-                json.dump(data, f, indent=2)
-            self.status_text = f"Track gespeichert: {filepath}"
-            self.track_saved = True
-            self.show_popup("Erfolg", f"Track gespeichert:\n{filepath}")
-        except Exception as e:
-            self.status_text = f"Fehler beim Speichern: {e}"
-            self.show_popup("Fehler", f"Fehler beim Speichern:\n{e}")
+        # Momentaufnahme, während der Worker schreibt, kommen evtl. weitere Punkte dazu
+        track = self.engine.snapshot()
+        count = len(track)
+
+        def progress(fraction):
+            self._report_status(f"Speichere Track... {fraction:.0%}")
+
+        self.status_text = "Speichere Track..."
+        self.run_in_background(
+            lambda: write_mapped_track(filepath, track, meta, progress=progress),
+            lambda result: self._on_track_saved(filepath, count),
+            lambda e: self._on_io_error("Speichern", e),
+        )
+
+    def _on_track_saved(self, filepath, count):
+        self.status_text = f"Track gespeichert: {filepath}"
+        self.engine.mark_saved(count)
+        self.show_popup("Erfolg", f"Track gespeichert:\n{filepath}")
+
+    def _on_io_error(self, action, e):
+        self.status_text = f"Fehler beim {action}: {e}"
+        self.show_popup("Fehler", f"Fehler beim {action}:\n{e}")
+
+    def run_in_background(self, work, on_done, on_error):
+        # work läuft im Worker-Thread, on_done/on_error danach im UI-Thread
+        def finished(future):
+            def deliver(dt):
+                error = future.exception()
+                if error:
+                    on_error(error)
+                else:
+                    on_done(future.result())
+            Clock.schedule_once(deliver)
+
+        self.worker.submit(work).add_done_callback(finished)
+
+    def _report_status(self, text):
+        # aus dem Worker-Thread aufrufbar
+        Clock.schedule_once(lambda dt: setattr(self, "status_text", text))
 
     def open_filechooser(self):
         content = BoxLayout(orientation='vertical', spacing=10, padding=10)
-        self.filechooser = FileChooserListView(path=os.path.join(os.getcwd(), "tracks"), filters=['*.json'])
+        self.filechooser = FileChooserListView(path=os.path.join(os.getcwd(), "tracks"), filters=['*.trk', '*.json', '*.gpx'])
         content.add_widget(self.filechooser)
 
         btn_layout = BoxLayout(size_hint_y=None, height='40dp', spacing=10)
@@ -270,52 +497,138 @@ class MainLayout(BoxLayout):
             self.status_text = "Datei existiert nicht."
             return
 
-        try:
-            with open(filepath, 'r') as f:
-                data = json.load(f)
-                points = data.get('track_points', [])
-                if not points:
-                    self.status_text = "Keine Track-Punkte gefunden."
-                    return
+        self.status_text = "Lade Track..."
+        self.run_in_background(
+            lambda: self._read_track(filepath),
+            lambda result: self._on_track_loaded(filepath, *result),
+            lambda e: self._on_io_error("Laden", e),
+        )
+
+    @staticmethod
+    def _read_track(filepath):
+        # läuft im Worker: Lesen und Nachrechnen der Distanz aus den Punkten
+        track, meta = read_track(filepath)
+        return track, meta, track_distance_km(track.lat, track.lon)
+
+    def _on_track_loaded(self, filepath, track, meta, distance):
+        if not track:
+            if isinstance(track, MappedTrack):
+                track.close()
+            self.status_text = "Keine Track-Punkte gefunden."
+            return
 
-                self.reset_tracking()
+        self.engine.load(track, meta, distance)
+        self.loaded_path = filepath
+        self._show_track(stream=True)
+        self.ids.duration_label.text = self.format_duration(self.engine.ride_duration)
+        self.ids.distance_label.text = f"Distanz: {self.engine.distance:.2f} km"
+
+    def _stream_track(self, dt):
+        # übernimmt den geladenen Track stückweise in die Karte, damit der
+        # Anfang der Strecke schon zu sehen ist und die UI bedienbar bleibt
+        layer = self.ids.track_layer
+        track = self.engine.track
+        total = len(track)
+        deadline = time.perf_counter() + LOAD_FRAME_BUDGET
+        while layer.count < total and time.perf_counter() < deadline:
+            layer.update(track, layer.count + LOAD_BATCH)
+        if layer.count < total:
+            self.status_text = f"Lade Track... {layer.count / total:.0%}"
+            return
+        self.load_event.cancel()
+        self.load_event = None
+        self.status_text = f"Track geladen: {self.loaded_path}"
+        self.show_popup("Erfolg", f"Track geladen:\n{self.loaded_path}")
 
-                mapview = self.ids.mapview
+    def _show_track(self, stream=False):
+        mapview = self.ids.mapview
+        track = self.engine.track
 
-                for lat, lon in points:
-                    self.track_points.append((lat, lon))
+        lat_start, lon_start = track[0]
+        self.start_marker = MapMarkerPopup(lat=lat_start, lon=lon_start)
+        mapview.add_widget(self.start_marker)
 
-                lat_start, lon_start = self.track_points[0]
-                self.start_marker = MapMarkerPopup(lat=lat_start, lon=lon_start)
-                mapview.add_widget(self.start_marker)
+        lat_end, lon_end = track[-1]
+        self.end_marker = MapMarkerPopup(lat=lat_end, lon=lon_end)
+        mapview.add_widget(self.end_marker)
 
-                lat_end, lon_end = self.track_points[-1]
-                self.end_marker = MapMarkerPopup(lat=lat_end, lon=lon_end)
-                mapview.add_widget(self.end_marker)
+        mapview.center_on(lat_end, lon_end)
+        if stream:
+            self.load_event = Clock.schedule_interval(self._stream_track, 0)
+        else:
+            self.draw_track_line()
 
-                mapview.center_on(lat_end, lon_end)
-                self.draw_track_line()
+    def check_journal(self):
+        journal = self.engine.journal
+        if not journal.exists():
+            return
 
-                self.ride_duration = data.get("ride_duration_sec", 0)
-                self.ids.duration_label.text = self.format_duration(self.ride_duration)
+        content = BoxLayout(orientation='vertical', padding=10, spacing=10)
+        content.add_widget(Label(text="Eine nicht gespeicherte Fahrt wurde gefunden.\nWiederherstellen?"))
+        btn_layout = BoxLayout(size_hint_y=None, height='40dp', spacing=10)
+        btn_recover = Button(text='Wiederherstellen', size_hint_x=0.5)
+        btn_discard = Button(text='Verwerfen', size_hint_x=0.5)
+        btn_layout.add_widget(btn_recover)
+        btn_layout.add_widget(btn_discard)
+        content.add_widget(btn_layout)
 
-                self.status_text = f"Track geladen: {filepath}"
-                self.track_saved = True
-                self.show_popup("Erfolg", f"Track geladen:\n{filepath}")
+        popup = Popup(title='Fahrt wiederherstellen', content=content, size_hint=(0.8, 0.4))
+        btn_recover.bind(on_release=lambda *args: (popup.dismiss(), self.recover_journal()))
+        btn_discard.bind(on_release=lambda *args: (popup.dismiss(), journal.discard()))
+        popup.open()
+
+    def recover_journal(self):
+        journal = self.engine.journal
+        try:
+            records = journal.read()
         except Exception as e:
-            self.status_text = f"Fehler beim Laden: {e}"
-            self.show_popup("Fehler", f"Fehler beim Laden:\n{e}")
+            self.status_text = f"Fehler beim Wiederherstellen: {e}"
+            return
+        if not records:
+            journal.discard()
+            self.status_text = "Keine Track-Punkte gefunden."
+            return
+
+        self.engine.recover(records)
+        self._show_track()
+
+        self.ids.duration_label.text = self.format_duration(self.engine.ride_duration)
+        self.ids.distance_label.text = f"Distanz: {self.engine.distance:.2f} km"
+        self._update_stats()
+        self.status_text = f"Fahrt wiederhergestellt: {len(records)} Punkte"
+
+    def _start_mock(self):
+        # synthetische Fahrt mit realistischem Tempo und GPS-Fehler; nach einer
+        # Pause geht es an derselben Stelle weiter
+        if self.mock_ride is None:
+            rate = float(os.environ.get(MOCK_RATE_ENV, MOCK_RATE))
+            self.mock_ride = SyntheticRide(seed=1, rate=rate, start_time=time.time())
+            self.mock_fixes = iter(self.mock_ride)
+            self.mock_count = 0
+        rate = self.mock_ride.rate
+        self.mock_started = time.monotonic() - self.mock_count / rate
+        # bei Raten über der Bildrate kommt der Aufruf einmal pro Frame
+        self.mock_event = Clock.schedule_interval(self.mock_gps_update, 1.0 / rate)
 
     def mock_gps_update(self, dt):
-        import random
-        lat = 52.5200 + random.uniform(-0.001, 0.001)
-        lon = 13.4050 + random.uniform(-0.001, 0.001)
-        self.on_location(lat=lat, lon=lon)
+        # alle seit dem letzten Aufruf fälligen Fixes, bei hohen Raten mehrere
+        due = int((time.monotonic() - self.mock_started) * self.mock_ride.rate) + 1
+        on_location = self.on_location
+        while self.mock_count < due:
+            lat, lon, timestamp, accuracy, altitude = next(self.mock_fixes)
+            on_location(lat=lat, lon=lon, timestamp=timestamp, accuracy=accuracy, altitude=altitude)
+            self.mock_count += 1
 
     def start_timer(self):
+        # die Dauer selbst führt die Engine; der Timer weckt die App nur einmal
+        # pro angezeigter Sekunde, und zwar dann, wenn sie umspringt
         if self.timer_event:
             self.timer_event.cancel()
-        self.timer_event = Clock.schedule_interval(self.update_timer, 1)
+        self._schedule_timer()
+
+    def _schedule_timer(self):
+        delay = self.engine.clock.until_next_second() + TIMER_SLACK
+        self.timer_event = Clock.schedule_once(self.update_timer, delay)
 
     def stop_timer(self):
         if self.timer_event:
@@ -323,14 +636,34 @@ class MainLayout(BoxLayout):
             self.timer_event = None
 
     def update_timer(self, dt):
-        self.ride_duration += 1
-        self.ids.duration_label.text = self.format_duration(self.ride_duration)
+        self.engine.tick()
+        self._schedule_timer()
+
+    def resume_timer(self):
+        # nach dem Hintergrund: die Uhr lief weiter, nur die Anzeige holt auf
+        if self.engine.running:
+            self.request_render("duration")
+            self.start_timer()
+
+    def _update_stats(self):
+        stats = self.engine.stats
+        self.speed_5s = stats.speed(0)
+        self.speed_30s = stats.speed(1)
+        self.speed_5min = stats.speed(2)
+        self.average_speed = stats.average_speed
+        self.max_speed = stats.max_speed
+        self.pace = stats.pace
+        self.moving_time = stats.moving_time
 
     def format_duration(self, seconds):
+        return f"Fahrtdauer: {self.format_time(seconds)}"
+
+    def format_time(self, seconds):
+        seconds = int(seconds)
         h = seconds // 3600
         m = (seconds % 3600) // 60
         s = seconds % 60
-        return f"Fahrtdauer: {h:02d}:{m:02d}:{s:02d}"
+        return f"{h:02d}:{m:02d}:{s:02d}"
 
     def show_popup(self, title, message):
         popup_content = BoxLayout(orientation='vertical', padding=10, spacing=10)
@@ -345,8 +678,26 @@ class MainLayout(BoxLayout):
 
 class BikeApp(App):
     def build(self):
+        # vor der MapView, sonst legt sie den Standard-Downloader an
+        self.downloader = TileDownloader.install()
         return MainLayout()
 
+    def on_start(self):
+        self.root.check_journal()
+
+    def on_pause(self):
+        self.root.engine.journal.flush(sync=True)
+        # im Hintergrund läuft die Uhr weiter, geweckt wird niemand
+        self.root.stop_timer()
+        return True
+
+    def on_resume(self):
+        self.root.resume_timer()
+
+    def on_stop(self):
+        self.root.engine.close()
+        self.downloader.close()
+
 
 if __name__ == "__main__":
     BikeApp().run()
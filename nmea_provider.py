@@ -0,0 +1,298 @@
+import calendar
+import os
+import select
+import socket
+import threading
+import time
+from functools import reduce
+from operator import xor
+
+from location_provider import LocationProvider
+
+GPSD_PORT = 2947
+GPSD_WATCH = b'?WATCH={"enable":true,"nmea":true};\n'  # gpsd schickt danach rohes NMEA
+MAX_SENTENCE = 128  # Bytes; NMEA erlaubt 82, etwas Luft für herstellereigene Sätze
+READ_SIZE = 4096
+POLL_TIMEOUT = 0.5  # Sekunden, so schnell reagiert der Lesethread auf stop()
+UERE = 4.0  # m Positionsfehler pro HDOP-Einheit: accuracy = HDOP * UERE
+KNOTS = 0.514444  # m/s
+
+
+def nmea_checksum(body):
+    # XOR über alle Bytes zwischen "$" und "*"
+    return reduce(xor, body, 0)
+
+
+def format_sentence(*fields):
+    # fertiger Satz mit Prüfsumme und CRLF, z.B. für Testdaten und Stand-ins
+    body = ",".join(str(field) for field in fields).encode("ascii")
+    return b"$%s*%02X\r\n" % (body, nmea_checksum(body))
+
+
+class NmeaParser:
+    # Zerlegt einen Bytestrom inkrementell in NMEA-0183-Sätze: feed() nimmt
+    # beliebig zerschnittene Stücke an und gibt die darin fertig gewordenen
+    # Sätze als Feldlisten zurück. Zwei Zustände: Satzanfang "$" suchen, dann
+    # das Zeilenende. Dazwischen wird nicht Byte für Byte gearbeitet, sondern
+    # mit find über den Puffer; erst ein vollständiger Satz wird dekodiert.
+    # Sätze ohne gültige Prüfsumme, abgeschnittene und überlange Sätze
+    # werden verworfen und gezählt. Mit wanted (z.B. {b"RMC", b"GGA"})
+    # werden andere Satztypen übersprungen, bevor die Prüfsumme gerechnet wird.
+
+    def __init__(self, wanted=None):
+        self.buffer = bytearray()
+        self.wanted = wanted
+        self.valid = 0
+        self.invalid = 0
+        self.skipped = 0
+
+    def feed(self, data):
+        buffer = self.buffer
+        buffer += data
+        sentences = []
+        position = 0
+        while True:
+            start = buffer.find(b"$", position)
+            if start < 0:
+                position = len(buffer)
+                break
+            end = buffer.find(b"\n", start, start + MAX_SENTENCE)
+            if end < 0:
+                if len(buffer) - start < MAX_SENTENCE:
+                    # Satz noch unvollständig, Rest beim nächsten feed()
+                    position = start
+                    break
+                self.invalid += 1
+                position = start + 1
+                continue
+            restart = buffer.rfind(b"$", start + 1, end)
+            if restart >= 0:
+                # neuer Satzanfang vor dem Zeilenende: der alte war abgeschnitten
+                self.invalid += 1
+                start = restart
+            position = end + 1
+            if self.wanted is not None and bytes(buffer[start + 3:start + 6]) not in self.wanted:
+                self.skipped += 1
+                continue
+            fields = self._decode(bytes(buffer[start + 1:end]))
+            if fields is None:
+                self.invalid += 1
+            else:
+                self.valid += 1
+                sentences.append(fields)
+        del buffer[:position]
+        return sentences
+
+    @staticmethod
+    def _decode(body):
+        body = body.rstrip(b"\r")
+        star = len(body) - 3
+        if star < 0 or body[star] != 0x2A:  # "*"
+            return None
+        try:
+            if int(body[star + 1:], 16) != nmea_checksum(body[:star]):
+                return None
+            return body[:star].decode("ascii").split(",")
+        except (ValueError, UnicodeDecodeError):
+            return None
+
+
+def _coordinate(value, hemisphere):
+    # NMEA (d)ddmm.mmmm nach Dezimalgrad
+    number = float(value)
+    degrees = int(number // 100)
+    result = degrees + (number - degrees * 100) / 60
+    return -result if hemisphere in ("S", "W") else result
+
+
+def _float(value):
+    return float(value) if value else float("nan")
+
+
+class NmeaDecoder:
+    # Setzt aus den Sätzen einer Messung (gleiche UTC-Zeit) einen Fix
+    # zusammen: RMC liefert Datum, Geschwindigkeit und Kurs, GGA Höhe, HDOP
+    # und Satelliten. Ein Fix geht raus, sobald beide da sind; Empfänger
+    # ohne GGA liefern ihn mit der nächsten Messung. Ohne gültige Lösung
+    # (RMC-Status V, GGA-Qualität 0) entsteht kein Fix.
+    SENTENCES = frozenset((b"RMC", b"GGA"))
+
+    def __init__(self):
+        self.date = None  # (Jahr, Monat, Tag) aus dem letzten RMC
+        self.epoch = None  # UTC-Zeit (Text) der laufenden Messung
+        self.fix = {}
+        self.have_rmc = False
+        self.have_gga = False
+
+    def decode(self, fields):
+        # Fix als dict für on_location oder None
+        kind = fields[0][-3:]
+        if kind == "RMC" and len(fields) >= 10:
+            handler = self._rmc
+        elif kind == "GGA" and len(fields) >= 10:
+            handler = self._gga
+        else:
+            return None
+        if not fields[1]:
+            # ohne UTC-Zeit lässt sich der Satz keiner Messung zuordnen
+            return None
+        result = None
+        if fields[1] != self.epoch:
+            result = self._finish()
+            self.epoch = fields[1]
+        try:
+            handler(fields)
+        except ValueError:
+            return result
+        if self.have_rmc and self.have_gga:
+            return self._finish()
+        return result
+
+    def _finish(self):
+        fix = self.fix
+        complete = "lat" in fix and not fix.get("invalid")
+        self.fix = {}
+        self.have_rmc = self.have_gga = False
+        if not complete:
+            return None
+        fix["timestamp"] = self._timestamp(self.epoch)
+        return fix
+
+    def _timestamp(self, text):
+        year, month, day = self.date or time.gmtime()[:3]
+        seconds = float(text[4:])
+        return calendar.timegm((year, month, day, int(text[:2]), int(text[2:4]), 0)) + seconds
+
+    def _position(self, fields, lat, lon):
+        if fields[lat] and fields[lon]:
+            self.fix["lat"] = _coordinate(fields[lat], fields[lat + 1])
+            self.fix["lon"] = _coordinate(fields[lon], fields[lon + 1])
+
+    def _rmc(self, fields):
+        self.have_rmc = True
+        if fields[2] != "A":
+            self.fix["invalid"] = True
+            return
+        date = fields[9]
+        if date:
+            year = int(date[4:6])
+            self.date = (year + (2000 if year < 80 else 1900), int(date[2:4]), int(date[:2]))
+        self._position(fields, 3, 5)
+        self.fix["speed"] = _float(fields[7]) * KNOTS
+        self.fix["bearing"] = _float(fields[8])
+
+    def _gga(self, fields):
+        self.have_gga = True
+        if fields[6] in ("", "0"):
+            self.fix["invalid"] = True
+            return
+        self._position(fields, 2, 4)
+        hdop = _float(fields[8])
+        self.fix["hdop"] = hdop
+        self.fix["accuracy"] = hdop * UERE
+        self.fix["altitude"] = _float(fields[9])
+        self.fix["satellites"] = int(fields[7] or 0)
+
+
+class NmeaProvider(LocationProvider):
+    # NMEA-0183-Quelle für Linux, wo plyer kein GPS kennt. source ist
+    #   "/dev/ttyUSB0" oder "/dev/ttyACM0@9600"  serieller Empfänger (Baudrate optional)
+    #   "aufnahme.nmea"                          Datei, so schnell wie gelesen
+    #   "tcp://host:port"                        roher NMEA-Strom
+    #   "gpsd://host[:port]"                     gpsd, per WATCH auf NMEA umgestellt
+    # Gelesen wird in einem eigenen Thread; on_location wird von dort aus
+    # aufgerufen, der Empfänger muss das in den UI-Thread weiterreichen.
+
+    def __init__(self, source):
+        super().__init__()
+        self.source = source
+        self.parser = NmeaParser(NmeaDecoder.SENTENCES)
+        self.decoder = NmeaDecoder()
+        self.thread = None  # aktueller Lesethread; ein abgelöster beendet sich selbst
+
+    @property
+    def running(self):
+        return self.thread is not None
+
+    def start(self, minTime=1000, minDistance=0):
+        if self.thread is not None:
+            return
+        # neue Verbindung, neuer Strom: Reste der alten gehören nicht dazu,
+        # weder halbe Sätze noch eine halb zusammengesetzte Messung
+        self.parser = NmeaParser(NmeaDecoder.SENTENCES)
+        self.decoder = NmeaDecoder()
+        self.thread = threading.Thread(target=self._run, name="nmea", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        # der Thread endet spätestens nach POLL_TIMEOUT
+        self.thread = None
+
+    def feed(self, data):
+        # Bytes der Quelle verarbeiten, Fixes an on_location; gibt ihre Anzahl zurück
+        count = 0
+        decode = self.decoder.decode
+        for fields in self.parser.feed(data):
+            fix = decode(fields)
+            if fix is not None:
+                count += 1
+                self.on_location(**fix)
+        return count
+
+    def _open(self):
+        # (lesbares Objekt für select, read(n), close())
+        source = self.source
+        for scheme, port in (("tcp://", None), ("gpsd://", GPSD_PORT)):
+            if source.startswith(scheme):
+                host, _, number = source[len(scheme):].partition(":")
+                connection = socket.create_connection((host, int(number or port)), timeout=5)
+                if scheme == "gpsd://":
+                    connection.sendall(GPSD_WATCH)
+                return connection, connection.recv, connection.close
+        path, _, baudrate = source.partition("@")
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_NOCTTY", 0))
+        if os.isatty(fd):
+            self._configure_serial(fd, int(baudrate) if baudrate else None)
+        return fd, lambda size: os.read(fd, size), lambda: os.close(fd)
+
+    @staticmethod
+    def _configure_serial(fd, baudrate):
+        import termios
+        import tty
+        tty.setraw(fd)
+        if baudrate:
+            attributes = termios.tcgetattr(fd)
+            attributes[4] = attributes[5] = getattr(termios, f"B{baudrate}")
+            termios.tcsetattr(fd, termios.TCSANOW, attributes)
+
+    def _run(self):
+        me = threading.current_thread()
+        try:
+            handle, read, close = self._open()
+        except (OSError, ValueError, AttributeError) as e:
+            if self.thread is me:
+                self.thread = None
+                self.status("provider-error", f"NMEA-Quelle {self.source} nicht erreichbar: {e}")
+            return
+        # ein abgelöster Thread meldet nichts mehr, sonst überschreibt er den
+        # Zustand des neuen (z.B. nach schnellem stop()/start())
+        if self.thread is me:
+            self.status("provider-enabled", f"NMEA-Quelle {self.source} verbunden")
+        try:
+            while self.thread is me:
+                if not select.select([handle], [], [], POLL_TIMEOUT)[0]:
+                    continue
+                data = read(READ_SIZE)
+                if not data:
+                    if self.thread is me:
+                        self.status("provider-disabled", f"NMEA-Quelle {self.source} beendet")
+                    break
+                if self.thread is me:
+                    self.feed(data)
+        except OSError as e:
+            if self.thread is me:
+                self.status("provider-error", f"Fehler beim Lesen von {self.source}: {e}")
+        finally:
+            if self.thread is me:
+                self.thread = None
+            close()
@@ -0,0 +1,127 @@
+import time
+from array import array
+from bisect import bisect_right
+
+from location_provider import LocationProvider
+from track_format import read_track
+from track_store import NAN
+
+DEFAULT_INTERVAL = 1.0  # Sekunden zwischen Punkten ohne (gültigen) Zeitstempel
+FAST_BATCH = 50  # Fixes pro pump() bei speed=0 ("so schnell wie möglich")
+MAX_SPEED = 1000  # höchster Zeitraffer
+
+
+class ReplayProvider(LocationProvider):
+    # Spielt einen gespeicherten Track (.trk, JSON, GPX) als GPS-Quelle ab.
+    # Der Takt kommt aus den Zeitstempeln des Tracks, im Zeitraffer um speed
+    # (1 bis 1000); speed=0 liefert so schnell wie möglich, FAST_BATCH Fixes
+    # pro pump(). Werte, Zeitstempel und Reihenfolge der Fixes hängen nur vom
+    # Track ab, nie von der Uhr.
+    # pump() ruft der Besitzer regelmäßig auf, in der App einmal pro Frame.
+
+    def __init__(self, track, speed=1.0, batch=FAST_BATCH, clock=time.monotonic):
+        if not 0 <= speed <= MAX_SPEED:
+            raise ValueError(f"speed muss zwischen 0 und {MAX_SPEED} liegen")
+        super().__init__()
+        self.track = track
+        self.speed = speed
+        self.batch = batch
+        self.clock = clock
+        # MappedTrack liefert für fehlende Spalten None
+        timestamps = track.timestamp if track.timestamp is not None else [NAN] * len(track)
+        self.offsets = self._offsets(timestamps)
+        self.origin = next((t for t in timestamps if t == t), 0.0)
+        self.position = 0
+        self.started_at = None  # Uhrzeit von start(), None wenn gestoppt
+        self.started_offset = 0.0  # Track-Zeit bei start()
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        track, _ = read_track(path)
+        return cls(track, **kwargs)
+
+    @staticmethod
+    def _offsets(timestamps):
+        # Sekunden ab dem ersten Punkt, nie rückwärts; fehlende Zeitstempel
+        # (alte JSON-Tracks) werden mit DEFAULT_INTERVAL aufgefüllt
+        offsets = array("d")
+        previous = NAN
+        current = 0.0
+        for timestamp in timestamps:
+            if offsets:
+                if timestamp == timestamp and previous == previous:
+                    current += max(timestamp - previous, 0.0)
+                else:
+                    current += DEFAULT_INTERVAL
+            previous = timestamp
+            offsets.append(current)
+        return offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def finished(self):
+        return self.position >= len(self.offsets)
+
+    @property
+    def duration(self):
+        # Abspieldauer in Sekunden bei speed, 0 bei "so schnell wie möglich"
+        if not self.offsets or not self.speed:
+            return 0.0
+        return self.offsets[-1] / self.speed
+
+    def start(self, minTime=1000, minDistance=0):
+        # setzt nach stop() an derselben Stelle fort
+        if self.finished:
+            return
+        self.started_at = self.clock()
+        self.started_offset = self.offsets[self.position]
+
+    def stop(self):
+        self.started_at = None
+
+    def rewind(self):
+        self.position = 0
+        if self.started_at is not None:
+            self.start()
+
+    def pump(self, now=None):
+        # liefert alle bis jetzt fälligen Fixes an on_location, gibt ihre Anzahl zurück
+        if self.started_at is None or self.finished:
+            return 0
+        start = self.position
+        if self.speed:
+            if now is None:
+                now = self.clock()
+            due = self.started_offset + (now - self.started_at) * self.speed
+            stop = bisect_right(self.offsets, due, start)
+        else:
+            stop = min(start + self.batch, len(self.offsets))
+        self._emit(start, stop)
+        return stop - start
+
+    def run(self):
+        # alle übrigen Fixes sofort, ohne Takt (für Benchmarks und Tests)
+        start = self.position
+        self._emit(start, len(self.offsets))
+        return len(self.offsets) - start
+
+    def _emit(self, start, stop):
+        track = self.track
+        lats = track.lat
+        lons = track.lon
+        accuracies = track.accuracy
+        elevations = track.elevation
+        offsets = self.offsets
+        origin = self.origin
+        on_location = self.on_location
+        for i in range(start, stop):
+            self.position = i + 1
+            on_location(
+                lat=lats[i],
+                lon=lons[i],
+                timestamp=origin + offsets[i],
+                accuracy=accuracies[i] if accuracies is not None else NAN,
+                altitude=elevations[i] if elevations is not None else NAN,
+            )
@@ -0,0 +1,39 @@
+import time
+
+
+class RideClock:
+    # Fahrtdauer aus Start/Pause-Intervallen auf der monotonen Uhr statt aus
+    # gezählten Timer-Ticks: verspätete Frames, Pausen und Zeitumstellungen
+    # verfälschen nichts, und niemand muss dafür jede Sekunde aufwachen.
+    # Gelesen wird nur, wenn die Anzeige sie braucht.
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.reset()
+
+    def reset(self, elapsed=0.0):
+        self.accumulated = elapsed  # Sekunden aus abgeschlossenen Intervallen
+        self.started_at = None  # Beginn des laufenden Intervalls, sonst None
+
+    @property
+    def running(self):
+        return self.started_at is not None
+
+    def start(self):
+        if self.started_at is None:
+            self.started_at = self.clock()
+
+    def stop(self):
+        if self.started_at is not None:
+            self.accumulated += self.clock() - self.started_at
+            self.started_at = None
+
+    def elapsed(self):
+        if self.started_at is None:
+            return self.accumulated
+        return self.accumulated + self.clock() - self.started_at
+
+    def until_next_second(self):
+        # Sekunden bis zum nächsten vollen Wert, damit die Anzeige genau dann
+        # umspringt und nicht bis zu einer Sekunde hinterherhinkt
+        return 1.0 - self.elapsed() % 1.0
@@ -0,0 +1,107 @@
+import os
+import struct
+import threading
+import time
+
+JOURNAL_MAGIC = b"BTJ1"
+RECORD = struct.Struct("<dddf")  # Zeitstempel, lat, lon, Genauigkeit
+FLUSH_RECORDS = 8
+FSYNC_INTERVAL = 15.0  # Sekunden
+
+
+class RideJournal:
+    # Laufende Fahrt als Folge fester Binär-Records. Geschrieben wird in
+    # kleinen Blöcken direkt ans Betriebssystem (übersteht einen Absturz der
+    # App), fsync läuft nur alle paar Sekunden (übersteht Stromausfall).
+    # Mit executor läuft das regelmäßige fsync dort statt im aufrufenden
+    # (UI-)Thread; flush(sync=True) und close() synchronisieren weiter sofort.
+
+    def __init__(self, path, flush_records=FLUSH_RECORDS, fsync_interval=FSYNC_INTERVAL, executor=None):
+        self.path = path
+        self.flush_records = flush_records
+        self.fsync_interval = fsync_interval
+        self.executor = executor
+        self.file = None
+        self.buffer = bytearray()
+        self.pending = 0
+        self.last_sync = 0.0
+        self.syncing = None  # Future des fsync im executor
+        self.lock = threading.Lock()  # hält close() auf, solange der executor synchronisiert
+
+    @property
+    def is_open(self):
+        return self.file is not None
+
+    def exists(self):
+        return os.path.isfile(self.path) and os.path.getsize(self.path) > len(JOURNAL_MAGIC)
+
+    def open(self, append=False):
+        self.close()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if append and self.exists():
+            self.file = open(self.path, "ab", buffering=0)
+            # ein halb geschriebener Record am Ende wird abgeschnitten
+            size = self.file.tell() - len(JOURNAL_MAGIC)
+            self.file.truncate(len(JOURNAL_MAGIC) + size // RECORD.size * RECORD.size)
+        else:
+            self.file = open(self.path, "wb", buffering=0)
+            self.file.write(JOURNAL_MAGIC)
+        self.flush(sync=True)
+
+    def append(self, timestamp, lat, lon, accuracy):
+        if self.file is None:
+            return
+        self.buffer += RECORD.pack(timestamp, lat, lon, accuracy)
+        self.pending += 1
+        if self.pending >= self.flush_records:
+            self.flush()
+
+    def flush(self, sync=False):
+        if self.file is None:
+            return
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer = bytearray()
+            self.pending = 0
+        now = time.monotonic()
+        if sync:
+            os.fsync(self.file.fileno())
+            self.last_sync = now
+        elif now - self.last_sync >= self.fsync_interval:
+            self.last_sync = now
+            if self.executor is None:
+                os.fsync(self.file.fileno())
+            elif self.syncing is None or self.syncing.done():
+                # ein noch laufendes fsync deckt die neuen Daten nicht ab,
+                # das nächste Intervall holt sie nach
+                self.syncing = self.executor.submit(self._sync, self.file)
+
+    def _sync(self, file):
+        # im executor; die Datei kann inzwischen geschlossen sein
+        with self.lock:
+            if file is self.file:
+                os.fsync(file.fileno())
+
+    def close(self):
+        if self.file is None:
+            return
+        self.flush(sync=True)
+        with self.lock:
+            self.file.close()
+            self.file = None
+
+    def discard(self):
+        self.close()
+        self.buffer = bytearray()
+        self.pending = 0
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def read(self):
+        with open(self.path, "rb") as f:
+            data = f.read()
+        if not data.startswith(JOURNAL_MAGIC):
+            return []
+        # ein halb geschriebener Record am Ende wird verworfen
+        end = len(JOURNAL_MAGIC) + (len(data) - len(JOURNAL_MAGIC)) // RECORD.size * RECORD.size
+        return list(RECORD.iter_unpack(memoryview(data)[len(JOURNAL_MAGIC):end]))
@@ -0,0 +1,127 @@
+from array import array
+
+WINDOWS = (5, 30, 300)  # Sekunden der gleitenden Geschwindigkeiten
+CAPACITY = 4096  # Fixes im Ringpuffer anfangs: 5 Minuten bis ca. 13 Hz, darüber wächst er
+MOVING_SPEED = 3.6  # km/h, darunter zählt die Zeit nicht als Bewegungszeit
+MAX_SPEED_WINDOW = 1  # Index in WINDOWS; kürzere Fenster verzerrt das GPS-Rauschen nach oben
+
+
+class RingBuffer:
+    # Puffer fester Größe über einem array("d"): Anhängen und Zugriff in O(1),
+    # ist er voll, wird der älteste Wert überschrieben. Indizes sind absolut
+    # (der wievielte Wert insgesamt), gültig sind die letzten capacity.
+    __slots__ = ("data", "capacity", "pushed")
+
+    def __init__(self, capacity):
+        self.data = array("d", [0.0]) * capacity
+        self.capacity = capacity
+        self.pushed = 0
+
+    def __len__(self):
+        return min(self.pushed, self.capacity)
+
+    @property
+    def oldest(self):
+        return max(0, self.pushed - self.capacity)
+
+    def push(self, value):
+        self.data[self.pushed % self.capacity] = value
+        self.pushed += 1
+
+    def at(self, index):
+        return self.data[index % self.capacity]
+
+    def clear(self):
+        self.pushed = 0
+
+    def grow(self, capacity):
+        # größerer Puffer mit denselben gültigen Werten unter denselben Indizes
+        data = array("d", [0.0]) * capacity
+        for index in range(self.oldest, self.pushed):
+            data[index % capacity] = self.data[index % self.capacity]
+        self.data = data
+        self.capacity = capacity
+
+
+class RideStats:
+    # Laufende Kennzahlen der Fahrt, pro Fix in O(1) (amortisiert):
+    # gleitende Geschwindigkeit über 5 s/30 s/5 min, Höchstgeschwindigkeit,
+    # Bewegungszeit, Durchschnitt und Pace in Bewegung. Zeit und kumulierte
+    # Distanz jedes Fixes liegen in Ringpuffern; jedes Fenster merkt sich
+    # seinen Anfang und schiebt ihn nur vorwärts. Würde ein Fix den Anfang
+    # des längsten Fensters überschreiben (hohe Fix-Rate), verdoppeln sich
+    # die Puffer, statt das Fenster stillschweigend zu kürzen.
+
+    def __init__(self, windows=WINDOWS, capacity=CAPACITY, moving_speed=MOVING_SPEED,
+                 max_speed_window=MAX_SPEED_WINDOW):
+        self.windows = windows
+        self.max_speed_window = max_speed_window
+        self.moving_speed = moving_speed
+        self.times = RingBuffer(capacity)
+        self.distances = RingBuffer(capacity)  # kumuliert, km
+        self.reset()
+
+    def reset(self):
+        self.times.clear()
+        self.distances.clear()
+        self.heads = [0] * len(self.windows)  # absoluter Index des Fensteranfangs
+        self.rolling = [0.0] * len(self.windows)  # km/h
+        self.distance = 0.0  # km
+        self.moving_time = 0.0  # Sekunden
+        self.max_speed = 0.0  # km/h
+        self.last_time = None
+
+    def add(self, timestamp, segment):
+        # segment: km seit dem letzten Fix; 0 für Fixes, die nur die Zeit
+        # weiterschieben (z.B. im Stand ausgedünnt)
+        self.distance += segment
+        if self.last_time is not None and timestamp <= self.last_time:
+            return
+        times = self.times
+        distance = self.distance
+        if times.pushed - min(self.heads) >= times.capacity:
+            times.grow(times.capacity * 2)
+            self.distances.grow(times.capacity)
+        times.push(timestamp)
+        self.distances.push(distance)
+        # direkt auf den arrays, das läuft bei jedem Fix
+        time_data = times.data
+        distance_data = self.distances.data
+        capacity = times.capacity
+        newest = times.pushed - 1
+        oldest = times.oldest
+        heads = self.heads
+        rolling = self.rolling
+        for i, window in enumerate(self.windows):
+            # Anfang = letzter Fix, der mindestens window Sekunden zurückliegt
+            head = heads[i]
+            if head < oldest:
+                head = oldest
+            limit = timestamp - window
+            while head < newest and time_data[(head + 1) % capacity] <= limit:
+                head += 1
+            heads[i] = head
+            span = timestamp - time_data[head % capacity]
+            speed = (distance - distance_data[head % capacity]) / span * 3600 if span > 0 else 0.0
+            rolling[i] = speed
+            if i == self.max_speed_window and span >= window and speed > self.max_speed:
+                # erst ein volles Fenster zählt, einzelne Sprünge zwischen zwei Fixes nicht
+                self.max_speed = speed
+
+        if self.last_time is not None and self.rolling[0] >= self.moving_speed:
+            self.moving_time += timestamp - self.last_time
+        self.last_time = timestamp
+
+    def speed(self, index=0):
+        # gleitende Geschwindigkeit im Fenster windows[index], km/h
+        return self.rolling[index]
+
+    @property
+    def average_speed(self):
+        # Durchschnitt in Bewegung, km/h
+        return self.distance / self.moving_time * 3600 if self.moving_time > 0 else 0.0
+
+    @property
+    def pace(self):
+        # Minuten pro km in Bewegung, 0 solange noch nichts gefahren ist
+        return self.moving_time / 60 / self.distance if self.distance > 0 and self.moving_time > 0 else 0.0
@@ -0,0 +1,137 @@
+import math
+import random
+
+METERS_PER_DEGREE = 111320.0
+START_TIME = 1.7e9  # Sekunden seit Epoch des ersten Fixes, wenn nichts anderes angegeben
+
+CRUISE_SPEED = (4.0, 8.5)  # m/s, Zielgeschwindigkeit je Straßenabschnitt (ca. 15-30 km/h)
+ACCELERATION = 0.8  # m/s²
+BRAKING = 1.5  # m/s²
+CREEP_SPEED = 0.5  # m/s, so rollt man die letzten Meter an die Haltelinie
+BLOCK_LENGTH = (150.0, 900.0)  # m zwischen zwei Kreuzungen
+STOP_CHANCE = 0.4  # Anteil der Kreuzungen mit Halt (Ampel, Vorfahrt)
+STOP_DURATION = (5.0, 60.0)  # s
+TURN_CHANCE = 0.35  # Anteil der Kreuzungen, an denen abgebogen wird
+TURN_SPEED = 3.0  # m/s beim Abbiegen
+TURN_RADIUS = 12.0  # m
+MIN_RADIUS = 60.0  # m, engste Kurve zwischen zwei Kreuzungen
+MAX_GRADE = 0.06  # Steigung, bremst bzw. beschleunigt die Zielgeschwindigkeit
+GPS_SIGMA = 3.0  # m, langsam wandernder GPS-Fehler (Gauss-Markov)
+GPS_TAU = 30.0  # s, Zeitkonstante dieses Fehlers
+GPS_JITTER = 1.0  # m, weißes Rauschen obendrauf
+OUTLIER_CHANCE = 0.001  # Anteil der Fixes mit grobem Sprung (Mehrwegeempfang)
+OUTLIER_SIGMA = 150.0  # m
+
+
+class SyntheticRide:
+    # Reproduzierbare Stadtfahrt aus einem Seed, für Last- und Dauertests bei
+    # beliebiger Fix-Rate: Straßenabschnitte mit eigener Zielgeschwindigkeit,
+    # Anfahren und Bremsen mit begrenzter Beschleunigung, Halte und Abbiegen an
+    # Kreuzungen, sanfte Kurven und Steigungen dazwischen. Die gemessene
+    # Position trägt einen langsam wandernden GPS-Fehler, Rauschen und
+    # vereinzelte Ausreißer. Gleicher Seed und gleiche Rate ergeben dieselben
+    # Fixes; erzeugt wird erst beim Iterieren, auch stundenlange 100-Hz-Fahrten
+    # brauchen also keinen Speicher.
+
+    def __init__(self, seed=1, rate=1.0, lat=52.5200, lon=13.4050, start_time=START_TIME):
+        self.seed = seed
+        self.rate = rate
+        self.lat = lat
+        self.lon = lon
+        self.start_time = start_time
+        self.true_lat = lat  # wahre Position des zuletzt gelieferten Fixes
+        self.true_lon = lon
+
+    def __iter__(self):
+        return self.fixes()
+
+    def fixes(self, seconds=None):
+        # (lat, lon, Zeitstempel, Genauigkeit, Höhe), endlos oder für seconds
+        rnd = random.Random(self.seed)
+        gauss = rnd.gauss
+        uniform = rnd.uniform
+        dt = 1.0 / self.rate
+        count = None if seconds is None else int(seconds * self.rate)
+        scale_y = METERS_PER_DEGREE
+        scale_x = METERS_PER_DEGREE * math.cos(math.radians(self.lat))
+        decay = math.exp(-dt / GPS_TAU)
+        drift = GPS_SIGMA * math.sqrt(1 - decay * decay)
+
+        x = y = 0.0
+        heading = uniform(0, 2 * math.pi)
+        speed = 0.0
+        curvature = 0.0
+        grade = 0.0
+        altitude = 40.0
+        turn_left = 0.0
+        error_x = gauss(0, GPS_SIGMA)
+        error_y = gauss(0, GPS_SIGMA)
+        # der erste Abschnitt beginnt an einer Haltelinie
+        stop_left = uniform(*STOP_DURATION) / 4
+        to_next = uniform(*BLOCK_LENGTH)
+        target = uniform(*CRUISE_SPEED)
+        stopping = rnd.random() < STOP_CHANCE
+        turning = rnd.random() < TURN_CHANCE
+
+        index = 0
+        while count is None or index < count:
+            if stop_left > 0:
+                stop_left -= dt
+                speed = 0.0
+            else:
+                cruise = max(target * (1 - 5 * grade), 2.5)
+                approach = 0.0 if stopping else min(TURN_SPEED, cruise) if turning else cruise
+                braking = (speed * speed - approach * approach) / (2 * BRAKING)
+                goal = approach if to_next <= braking else cruise
+                if speed < goal:
+                    speed = min(goal, speed + ACCELERATION * dt)
+                else:
+                    speed = max(goal, speed - BRAKING * dt)
+                if stopping and to_next > 1.0:
+                    speed = max(speed, CREEP_SPEED)
+
+                move = speed * dt
+                curvature = curvature * (1 - dt / 20) + gauss(0, 0.002 * math.sqrt(dt))
+                curvature = max(-1 / MIN_RADIUS, min(1 / MIN_RADIUS, curvature))
+                heading += curvature * move
+                if turn_left:
+                    step = min(abs(turn_left), move / TURN_RADIUS)
+                    step = step if turn_left > 0 else -step
+                    heading += step
+                    turn_left -= step
+                x += move * math.sin(heading)
+                y += move * math.cos(heading)
+                grade = max(-MAX_GRADE, min(MAX_GRADE, grade + gauss(0, 0.0005 * math.sqrt(move))))
+                altitude += grade * move
+
+                to_next -= move
+                if to_next <= 0:
+                    # Kreuzung: halten und/oder abbiegen, dann den nächsten Abschnitt auswürfeln
+                    if stopping:
+                        stop_left = uniform(*STOP_DURATION)
+                        speed = 0.0
+                    if turning:
+                        turn_left = math.pi / 2 if rnd.random() < 0.5 else -math.pi / 2
+                    to_next = uniform(*BLOCK_LENGTH)
+                    target = uniform(*CRUISE_SPEED)
+                    stopping = rnd.random() < STOP_CHANCE
+                    turning = rnd.random() < TURN_CHANCE
+
+            error_x = error_x * decay + gauss(0, drift)
+            error_y = error_y * decay + gauss(0, drift)
+            measured_x = x + error_x + gauss(0, GPS_JITTER)
+            measured_y = y + error_y + gauss(0, GPS_JITTER)
+            if rnd.random() < OUTLIER_CHANCE:
+                measured_x += gauss(0, OUTLIER_SIGMA)
+                measured_y += gauss(0, OUTLIER_SIGMA)
+
+            self.true_lat = self.lat + y / scale_y
+            self.true_lon = self.lon + x / scale_x
+            yield (
+                self.lat + measured_y / scale_y,
+                self.lon + measured_x / scale_x,
+                self.start_time + index * dt,
+                GPS_SIGMA * uniform(1.0, 2.5),
+                altitude + gauss(0, 2 * GPS_SIGMA),
+            )
+            index += 1
@@ -0,0 +1,29 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import ride_journal
+from ride_journal import RideJournal
+
+
+def test_interval_fsync_runs_in_executor(tmp_path, monkeypatch):
+    threads = []
+    fsync = os.fsync
+
+    def record(fd):
+        threads.append(threading.current_thread())
+        fsync(fd)
+
+    monkeypatch.setattr(ride_journal.os, "fsync", record)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        journal = RideJournal(str(tmp_path / "ride.journal"), flush_records=1, fsync_interval=0.0,
+                              executor=executor)
+        journal.open()
+        del threads[:]  # open synchronisiert sofort
+        for i in range(20):
+            journal.append(float(i), 48.0, 11.0, 5.0)
+        executor.submit(lambda: None).result()
+        assert threads and threading.main_thread() not in threads
+        journal.close()
+    assert threads[-1] is threading.main_thread()  # close synchronisiert sofort
+    assert [record[0] for record in journal.read()] == [float(i) for i in range(20)]
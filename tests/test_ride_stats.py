@@ -0,0 +1,22 @@
+import pytest
+
+from ride_stats import CAPACITY, RideStats
+
+
+@pytest.mark.parametrize("rate", [1, 10, 50, 100])
+def test_five_minute_window_at_high_rate(rate):
+    # 18 km/h gleichmäßig, dann 36 km/h: nach 100 s mit 36 km/h liegt im
+    # 5-Minuten-Fenster noch 200 s lang die langsame Strecke
+    stats = RideStats()
+    t = 0.0
+    step = 1.0 / rate
+    for _ in range(600 * rate):
+        t += step
+        stats.add(t, 18 / 3600 * step)
+    for _ in range(100 * rate):
+        t += step
+        stats.add(t, 36 / 3600 * step)
+    assert stats.speed(0) == pytest.approx(36, rel=1e-6)
+    assert stats.speed(2) == pytest.approx((200 * 18 + 100 * 36) / 300, rel=1e-3)
+    if rate * 300 >= CAPACITY:
+        assert stats.times.capacity > CAPACITY
@@ -0,0 +1,45 @@
+import os
+import threading
+import time
+
+from tile_cache import SqliteTileCache
+
+
+def stored_size(cache):
+    return cache._db().execute("SELECT COALESCE(SUM(size), 0) FROM tiles").fetchone()[0]
+
+
+def test_size_matches_database_under_concurrent_puts(tmp_path):
+    cache = SqliteTileCache(str(tmp_path / "tiles.mbtiles"), budget=50 * 1000)
+
+    def writer(offset):
+        for i in range(200):
+            # überlappende Schlüssel: Ersetzen ändert die Größe
+            key = ("osm", 15, i % 40, offset % 2)
+            cache.put(key, bytes(500 + (i * 37 + offset) % 1500))
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    deadline = time.time() + 5
+    while cache.size > cache.budget and time.time() < deadline:
+        time.sleep(0.01)
+    cache.close()
+    assert cache.size == stored_size(cache)
+    assert cache.size <= cache.budget
+
+
+def test_import_runs_in_background(tmp_path):
+    for x in range(3):
+        (tmp_path / f"osm_15_{x}_7.png").write_bytes(b"png" * 10)
+    cache = SqliteTileCache(str(tmp_path / "tiles.mbtiles"))
+    cache.schedule_import(str(tmp_path), remove=False)
+    deadline = time.time() + 5
+    while cache.get(("osm", 15, 2, 7)) is None and time.time() < deadline:
+        time.sleep(0.01)
+    cache.close()
+    assert cache.get(("osm", 15, 0, 7)) == b"png" * 10
+    assert cache.size == 90
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".png")]) == 3
@@ -0,0 +1,67 @@
+import math
+from types import SimpleNamespace
+
+from tile_queue import TileQueue, view_center
+
+
+def make_tile(x, y, zoom=15):
+    return SimpleNamespace(tile_x=x, tile_y=y, zoom=zoom, state="loading")
+
+
+def fill(queue, center_x, center_y, radius=4):
+    for x in range(center_x - radius, center_x + radius + 1):
+        for y in range(center_y - radius, center_y + radius + 1):
+            queue.push(make_tile(x, y))
+
+
+def test_nearest_tile_first():
+    queue = TileQueue()
+    fill(queue, 100, 200)
+    queue.set_view(15, 103.5, 197.5)
+    tile = queue.pop()
+    assert (tile.tile_x, tile.tile_y) == (103, 197)
+
+
+def test_current_zoom_before_distance():
+    queue = TileQueue()
+    queue.set_view(15, 100.5, 200.5)
+    queue.push(make_tile(120, 220))
+    queue.push(make_tile(50, 100, zoom=14))
+    assert queue.pop().zoom == 15
+
+
+def test_done_tiles_are_cancelled():
+    queue = TileQueue()
+    tiles = [make_tile(x, 0) for x in range(3)]
+    for tile in tiles:
+        queue.push(tile)
+    tiles[0].state = tiles[1].state = "done"
+    queue.set_view(15, 0.5, 0.5)
+    assert len(queue) == 1
+    assert queue.pop() is tiles[2]
+    assert queue.pop() is None
+    assert queue.cancelled == 2
+
+
+class MercatorSource:
+    # rechnet wie kivy_garden.mapview.source.MapSource, ohne Kivy
+    dp_tile_size = 256
+
+    def get_x(self, zoom, lon):
+        return (lon + 180.0) / 360.0 * 2.0 ** zoom * self.dp_tile_size
+
+    def get_y(self, zoom, lat):
+        lat = math.radians(-lat)
+        return (1.0 - math.log(math.tan(lat) + 1.0 / math.cos(lat)) / math.pi) / 2.0 * 2.0 ** zoom * self.dp_tile_size
+
+
+def test_view_center_in_tiles_from_bottom():
+    # Berlin auf Zoomstufe 15; tile_y zählt wie bei MapView von unten
+    x, y = view_center(MercatorSource(), 15, 52.5200, 13.4050)
+    assert (int(x), int(y)) == (17604, 22021)
+
+    queue = TileQueue()
+    fill(queue, 17604, 22021)
+    queue.set_view(15, x, y)
+    tile = queue.pop()
+    assert (tile.tile_x, tile.tile_y) == (17604, 22021)
@@ -0,0 +1,43 @@
+from tracking_engine import TrackingEngine
+
+
+def ride(engine, count, start=0):
+    for i in range(start, start + count):
+        engine.add_fix(52.52 + i * 1e-4, 13.405, 1.7e9 + i, 5.0)
+
+
+def test_mark_saved_after_growth_keeps_ride_unsaved():
+    engine = TrackingEngine()
+    engine.start()
+    ride(engine, 10)
+    count = len(engine.snapshot())
+    ride(engine, 5, start=10)
+    engine.mark_saved(count)
+    assert not engine.saved
+
+
+def test_mark_saved_with_full_snapshot():
+    engine = TrackingEngine()
+    engine.start()
+    ride(engine, 10)
+    engine.mark_saved(len(engine.snapshot()))
+    assert engine.saved
+
+
+def test_add_after_stop_is_rejected():
+    engine = TrackingEngine()
+    engine.start()
+    ride(engine, 3)
+    engine.stop()
+    assert not engine.add_fix(52.6, 13.4, 1.7e9 + 10, 5.0)
+    assert len(engine.track) == 3
+
+
+def test_add_after_reset_is_rejected():
+    engine = TrackingEngine()
+    engine.start()
+    ride(engine, 3)
+    engine.reset()
+    assert not engine.add_fix(52.6, 13.4, 1.7e9 + 10, 5.0)
+    assert len(engine.track) == 0
+    assert engine.saved
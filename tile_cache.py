@@ -0,0 +1,268 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from os.path import dirname, join
+
+CACHE_FILE = "tiles.mbtiles"
+CACHE_BUDGET = 200 * 1024 * 1024  # Bytes Kacheldaten, darüber wird aufgeräumt
+EVICT_TARGET = 0.9  # Anteil des Budgets, auf den das Aufräumen zurückgeht
+FLUSH_INTERVAL = 30.0  # Sekunden, so lange werden Zugriffszeiten gesammelt
+EVICT_BATCH = 256  # Kacheln pro Löschtransaktion
+IMPORT_BATCH = 256  # Dateien pro Transaktion beim Übernehmen des alten Verzeichnisses
+MMAP_SIZE = 256 * 1024 * 1024  # Bytes der Datei, die SQLite per mmap statt read() liest
+IMAGE_EXTS = ("png", "jpg", "jpeg")
+TEXTURE_BUDGET = 64 * 1024 * 1024  # Bytes Texturspeicher für zuletzt gezeigte Kacheln, ca. 256 Kacheln
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS tiles (
+    source TEXT NOT NULL,
+    zoom_level INTEGER NOT NULL,
+    tile_column INTEGER NOT NULL,
+    tile_row INTEGER NOT NULL,
+    tile_data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS tiles_key ON tiles (source, zoom_level, tile_column, tile_row);
+CREATE INDEX IF NOT EXISTS tiles_accessed ON tiles (accessed);
+"""
+METADATA = (("name", "Kachel-Cache"), ("format", "png"), ("minzoom", "0"), ("maxzoom", "19"))
+WHERE_KEY = "source = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?"
+
+
+class DirectoryTileCache:
+    # Das bisherige Verfahren von mapview: jede Kachel eine Datei
+    # {cache_key}_{z}_{x}_{y}.{ext} im Cache-Verzeichnis, ohne Obergrenze.
+    # Schlüssel sind (cache_key, zoom, tile_x, tile_y) wie bei Tile, also
+    # mit y von unten.
+
+    def __init__(self, path, ext="png"):
+        self.path = path
+        self.ext = ext
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        source, zoom, x, y = key
+        return join(self.path, f"{source}_{zoom}_{x}_{y}.{self.ext}")
+
+    def get(self, key):
+        try:
+            with open(self._file(key), "rb") as fd:
+                return fd.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data):
+        # erst unter anderem Namen schreiben, dann umbenennen: eine Kachel ist
+        # ganz oder gar nicht da, auch wenn die App mittendrin stirbt
+        path = self._file(key)
+        with open(path + ".part", "wb") as fd:
+            fd.write(data)
+        os.replace(path + ".part", path)
+
+    def close(self):
+        pass
+
+
+class SqliteTileCache:
+    # Alle Kacheln in einer SQLite-Datenbank im MBTiles-Schema (tiles mit
+    # zoom_level/tile_column/tile_row, tile_row wie MBTiles von unten, dazu
+    # metadata), die Datei lässt sich also auch mit MBTilesMapSource offline
+    # öffnen. Zusätzlich pro Kachel Kartenquelle, Größe und letzte
+    # Zugriffszeit. Übersteigen die Kacheldaten budget Bytes, löscht ein
+    # Hintergrundthread die am längsten nicht gebrauchten, bis wieder nur
+    # EVICT_TARGET des Budgets belegt ist. Zugriffszeiten sammelt get() im
+    # Speicher; geschrieben werden sie gebündelt vom selben Thread, damit
+    # nicht jeder Treffer eine Schreibtransaktion kostet. Jeder Thread hat
+    # eine eigene Verbindung; im WAL-Modus blockieren Leser die Schreiber nicht.
+    # Alles, was self.size ändert (put, Aufräumen, Übernahme), liest und
+    # schreibt die Datenbank unter self.lock, damit size gleich SUM(size) bleibt.
+
+    def __init__(self, path, budget=CACHE_BUDGET):
+        self.path = path
+        self.budget = budget
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.touched = {}  # Schlüssel -> Zugriffszeit, noch nicht in der Datenbank
+        os.makedirs(dirname(path) or ".", exist_ok=True)
+        db = self._db()
+        with db:
+            db.executescript(SCHEMA)
+            db.executemany("INSERT OR IGNORE INTO metadata VALUES (?, ?)", METADATA)
+        self.size = db.execute("SELECT COALESCE(SUM(size), 0) FROM tiles").fetchone()[0]
+        self.imports = []  # (Verzeichnis, remove) für den Hintergrundthread
+        self.wakeup = threading.Event()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name="tile-cache", daemon=True)
+        self.thread.start()
+
+    def _db(self):
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = self.local.db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        return db
+
+    def get(self, key):
+        row = self._db().execute(f"SELECT tile_data FROM tiles WHERE {WHERE_KEY}", key).fetchone()
+        if row is None:
+            return None
+        with self.lock:
+            self.touched[key] = time.time()
+        return row[0]
+
+    def put(self, key, data):
+        db = self._db()
+        # eine Transaktion: die Kachel steht ganz oder gar nicht in der Datei
+        with self.lock:
+            with db:
+                old = db.execute(f"SELECT size FROM tiles WHERE {WHERE_KEY}", key).fetchone()
+                db.execute("INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?)",
+                           (*key, data, len(data), time.time()))
+            self.size += len(data) - (old[0] if old else 0)
+            if self.size > self.budget:
+                self.wakeup.set()
+
+    def schedule_import(self, path, remove=True):
+        # import_directory im Hintergrundthread, z.B. beim Start der App
+        self.imports.append((path, remove))
+        self.wakeup.set()
+
+    def import_directory(self, path, remove=True):
+        # einmalige Übernahme des Verzeichnisses, in dem mapview jede Kachel als
+        # {cache_key}_{z}_{x}_{y}.{ext} abgelegt hat; Zugriffszeit ist das
+        # Änderungsdatum der Datei. Gibt die Zahl der übernommenen Kacheln zurück.
+        # Ein Eintrag in metadata merkt sich das Verzeichnis, damit bleibende
+        # Dateien nicht bei jedem Start erneut (und nach dem Aufräumen wieder)
+        # eingelesen werden.
+        db = self._db()
+        if db.execute("SELECT 1 FROM metadata WHERE name = 'imported' AND value = ?", (path,)).fetchone():
+            return 0
+        files = []
+        for name in sorted(os.listdir(path)):
+            stem, _, ext = name.rpartition(".")
+            parts = stem.rsplit("_", 3)
+            if ext.lower() not in IMAGE_EXTS or len(parts) != 4:
+                continue
+            try:
+                key = (parts[0], int(parts[1]), int(parts[2]), int(parts[3]))
+            except ValueError:
+                continue
+            files.append((key, join(path, name)))
+        for start in range(0, len(files), IMPORT_BATCH):
+            batch = files[start:start + IMPORT_BATCH]
+            rows = []
+            for key, file in batch:
+                with open(file, "rb") as fd:
+                    data = fd.read()
+                rows.append((*key, data, len(data), os.path.getmtime(file)))
+            with self.lock:
+                with db:
+                    # schon vorhandene Kacheln sind neuer als die Dateien
+                    db.executemany("INSERT OR IGNORE INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self.size = db.execute("SELECT COALESCE(SUM(size), 0) FROM tiles").fetchone()[0]
+            if remove:
+                for _, file in batch:
+                    os.remove(file)
+        with db:
+            db.execute("INSERT OR REPLACE INTO metadata VALUES ('imported', ?)", (path,))
+        if self.size > self.budget:
+            self.wakeup.set()
+        return len(files)
+
+    def close(self):
+        self.closed = True
+        self.wakeup.set()
+        self.thread.join()
+
+    def _run(self):
+        while not self.closed:
+            self.wakeup.wait(FLUSH_INTERVAL)
+            self.wakeup.clear()
+            while self.imports and not self.closed:
+                path, remove = self.imports.pop(0)
+                try:
+                    self.import_directory(path, remove)
+                except (OSError, sqlite3.Error) as e:
+                    print("Tile cache import error: {!r}".format(e))
+            self._flush()
+            if self.size > self.budget:
+                self._evict()
+        self._flush()
+
+    def _flush(self):
+        with self.lock:
+            touched, self.touched = self.touched, {}
+        if touched:
+            db = self._db()
+            with db:
+                db.executemany(f"UPDATE tiles SET accessed = ? WHERE {WHERE_KEY}",
+                               [(when, *key) for key, when in touched.items()])
+
+    def _evict(self):
+        # die Datei wird dabei nicht kleiner, SQLite verwendet die Seiten weiter
+        db = self._db()
+        target = self.budget * EVICT_TARGET
+        while self.size > target and not self.closed:
+            # Auswahl und Löschen unter dem Lock, den auch put hält: zwischen
+            # beiden kann keine Kachel ersetzt werden und ihre Größe ändern
+            with self.lock:
+                excess = self.size - target
+                victims = []
+                freed = 0
+                for rowid, size in db.execute("SELECT rowid, size FROM tiles ORDER BY accessed LIMIT ?",
+                                              (EVICT_BATCH,)):
+                    victims.append((rowid,))
+                    freed += size
+                    if freed >= excess:
+                        break
+                if not victims:
+                    break
+                with db:
+                    db.executemany("DELETE FROM tiles WHERE rowid = ?", victims)
+                self.size -= freed
+
+
+class TextureCache:
+    # Die zuletzt gezeigten Kacheln als fertige Texturen, damit eine Kachel,
+    # die beim Hin- und Herschieben wieder ins Bild kommt, sofort da ist:
+    # ohne Datenbank, ohne PNG-Dekodieren. LRU mit Obergrenze budget in Bytes
+    # Texturspeicher (Breite * Höhe * 4, so legt die GPU sie meist ab).
+    # Nur aus dem UI-Thread benutzen, es gibt kein Lock.
+
+    def __init__(self, budget=TEXTURE_BUDGET):
+        self.budget = budget
+        self.entries = OrderedDict()  # Schlüssel -> (Textur, Bytes), älteste zuerst
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, texture):
+        size = texture.width * texture.height * 4
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= old[1]
+        if size > self.budget:
+            return
+        self.entries[key] = (texture, size)
+        self.size += size
+        while self.size > self.budget:
+            _, (_, freed) = self.entries.popitem(last=False)
+            self.size -= freed
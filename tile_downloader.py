@@ -0,0 +1,140 @@
+from io import BytesIO
+from os.path import join
+
+from kivy.clock import Clock
+from kivy.core.image import Image as CoreImage
+from kivy.logger import Logger
+from kivy_garden.mapview.constants import CACHE_DIR
+from kivy_garden.mapview.downloader import USER_AGENT, Downloader
+
+from tile_cache import CACHE_FILE, TEXTURE_BUDGET, SqliteTileCache, TextureCache
+from tile_fetcher import TileFetcher, tile_subdomain
+from tile_queue import CompletionQueue, TileQueue
+
+
+def tile_key(tile):
+    # Schlüssel für die Caches: Kartenquelle, Zoom, x, y (von unten wie bei Tile)
+    return tile.map_source.cache_key, tile.zoom, tile.tile_x, tile.tile_y
+
+
+class TileDownloader(Downloader):
+    # Der Downloader von mapview, aber mit wiederverwendeten HTTP-Verbindungen
+    # (TileFetcher) statt requests.get pro Kachel. install() setzt ihn als
+    # Downloader.instance(), bevor die MapView ihre ersten Kacheln anfordert.
+    # Kacheln warten in einer TileQueue statt in der FIFO des Executors: jeder
+    # Auftrag dort holt sich beim Start die dann wichtigste Kachel, nach
+    # schnellem Schwenken oder Zoomen kommt also zuerst die neue Bildmitte.
+    # Fertige Downloads melden sich über eine CompletionQueue selbst, statt
+    # dass _check_executor 60-mal pro Sekunde nachsieht. Kacheln liegen nicht
+    # mehr als Dateien in cache_dir, sondern in einem Cache-Backend (get/put
+    # mit (cache_key, zoom, tile_x, tile_y)), standardmäßig SqliteTileCache.
+    # Davor sitzt ein TextureCache mit den zuletzt gezeigten Texturen; Treffer
+    # dort erscheinen noch im selben Frame, ohne Thread und ohne Einblenden.
+
+    def __init__(self, cache=None, texture_budget=TEXTURE_BUDGET, **kwargs):
+        super().__init__(**kwargs)
+        if cache is None:
+            cache = SqliteTileCache(join(self.cache_dir, CACHE_FILE))
+        self.cache = cache
+        self.textures = TextureCache(texture_budget)
+        Clock.unschedule(self._check_executor)
+        self.completions = CompletionQueue(Clock.create_trigger(self._deliver))
+        self.fetcher = TileFetcher(headers={"User-agent": USER_AGENT})
+        self.queue = TileQueue()
+
+    @classmethod
+    def install(cls, cache_dir=CACHE_DIR, cache=None):
+        downloader = Downloader._instance = cls(cache_dir=cache_dir, cache=cache)
+        if isinstance(downloader.cache, SqliteTileCache):
+            # Kacheldateien aus der Zeit vor der Datenbank übernehmen, im
+            # Hintergrund statt beim Start im UI-Thread; sie bleiben liegen,
+            # cache/ ist im Repository eingecheckt
+            downloader.cache.schedule_import(cache_dir, remove=False)
+        return downloader
+
+    def close(self):
+        # Verbindungen des Pools schließen, dann Zugriffszeiten schreiben
+        self.fetcher.close()
+        self.cache.close()
+
+    def download_tile(self, tile):
+        Logger.debug(
+            "Downloader: queue(tile) zoom={} x={} y={}".format(
+                tile.zoom, tile.tile_x, tile.tile_y
+            )
+        )
+        texture = self.textures.get(tile_key(tile))
+        if texture is not None:
+            # eben erst aus dem Bild gefallen: gleich fertig zeigen
+            tile.texture = texture
+            tile.g_color.a = 1.0
+            tile.state = "animated"
+            return
+        self.queue.push(tile)
+        self.completions.watch(self.executor.submit(self._next_tile))
+
+    def submit(self, f, *args, **kwargs):
+        self.completions.watch(self.executor.submit(f, *args, **kwargs))
+
+    def download(self, url, callback, **kwargs):
+        Logger.debug("Downloader: queue(url) {}".format(url))
+        self.completions.watch(self.executor.submit(self._download_url, url, callback, kwargs))
+
+    def _deliver(self, dt):
+        if self.completions.drain(self.cap_time):
+            # Rest im nächsten Frame, wie bei _check_executor
+            self.completions.wake()
+
+    def set_view(self, zoom, x, y):
+        # Bildmitte in Kacheln der Zoomstufe zoom, aus MapView.on_map_relocated
+        self.queue.set_view(zoom, x, y)
+
+    def _next_tile(self):
+        tile = self.queue.pop()
+        if tile is not None:
+            return self._load_tile(tile)
+
+    def _download_url(self, url, callback, kwargs):
+        Logger.debug("Downloader: download(url) {}".format(url))
+        response = self.fetcher.get(url, **kwargs)
+        response.raise_for_status()
+        return callback, (url, response)
+
+    def _load_tile(self, tile):
+        if tile.state == "done":
+            return
+        map_source = tile.map_source
+        key = tile_key(tile)
+        data = self.cache.get(key)
+        if data is not None:
+            Logger.debug("Downloader: use cache {}".format(key))
+        else:
+            tile_y = map_source.get_row_count(tile.zoom) - tile.tile_y - 1
+            uri = map_source.url.format(
+                z=tile.zoom, x=tile.tile_x, y=tile_y,
+                s=tile_subdomain(map_source.subdomains, tile.tile_x, tile_y),
+            )
+            Logger.debug("Downloader: download(tile) {}".format(uri))
+            try:
+                response = self.fetcher.get(uri)
+                response.raise_for_status()
+                data = response.content
+                self.cache.put(key, data)
+                Logger.debug("Downloaded {} bytes: {}".format(len(data), uri))
+            except Exception as e:
+                print("Downloader error: {!r}".format(e))
+                return
+        # dekodiert wird hier im Thread wie bei MBTilesMapSource, die Textur
+        # entsteht erst in _show_tile im UI-Thread
+        try:
+            image = CoreImage(BytesIO(data), ext=map_source.image_ext, nocache=True)
+        except Exception as e:
+            print("Downloader error: {!r}".format(e))
+            return
+        return self._show_tile, (tile, key, image)
+
+    def _show_tile(self, tile, key, image):
+        texture = image.texture
+        self.textures.put(key, texture)
+        tile.texture = texture
+        tile.state = "need-animation"
@@ -0,0 +1,38 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+PER_HOST_CONNECTIONS = 2  # gleichzeitige Verbindungen pro Host, so viel erlaubt die OSM-Richtlinie
+MAX_HOSTS = 16  # Hosts, deren Verbindungen gleichzeitig offen gehalten werden
+TIMEOUT = 5  # Sekunden pro Anfrage
+RETRIES = 2  # Wiederholungen bei Verbindungsfehlern
+
+
+def tile_subdomain(subdomains, x, y):
+    # feste Subdomain pro Kachel wie bei Leaflet: die Last verteilt sich
+    # gleichmäßig, und dieselbe Kachel kommt immer vom selben Host
+    return subdomains[(x + y) % len(subdomains)] if subdomains else ""
+
+
+class TileFetcher:
+    # Eine requests.Session für alle Download-Threads: Verbindungen bleiben
+    # offen (keep-alive) und werden für die nächste Kachel wiederverwendet,
+    # statt für jede neu aufgebaut zu werden (TCP, bei https auch TLS). Pro
+    # Host, also pro Subdomain a/b/c, gibt es höchstens per_host Verbindungen;
+    # weitere Threads warten, bis eine davon frei wird.
+
+    def __init__(self, per_host=PER_HOST_CONNECTIONS, headers=None, timeout=TIMEOUT):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=MAX_HOSTS, pool_maxsize=per_host,
+                              pool_block=True, max_retries=RETRIES)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,114 @@
+import heapq
+import itertools
+import threading
+import time
+import traceback
+from collections import deque
+
+
+def view_center(map_source, zoom, lat, lon):
+    # Bildmitte in Kacheln der Zoomstufe, wie set_view sie erwartet; get_y
+    # der MapSource zählt wie tile_y von unten
+    size = map_source.dp_tile_size
+    return map_source.get_x(zoom, lon) / size, map_source.get_y(zoom, lat) / size
+
+
+class TileQueue:
+    # Warteschlange der Kachel-Downloads für die Threads des Downloaders.
+    # Statt der Reihenfolge der Anfragen gilt: erst Kacheln der aktuellen
+    # Zoomstufe, darunter die nächsten zur Bildmitte. set_view() sortiert nach
+    # jeder Bewegung der Karte neu und wirft dabei Kacheln hinaus, die die
+    # MapView inzwischen aufgegeben hat (state "done", aus dem Bild gescrollt
+    # oder weggezoomt); die kosten dann weder Thread noch Verbindung.
+    # Koordinaten in Kacheln wie tile_x/tile_y, also mit y von unten.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.heap = []  # (Zoomabstand, Abstand² zur Mitte, Reihenfolge, Kachel)
+        self.order = itertools.count()
+        self.view = None  # (Zoom, x, y) der Bildmitte
+        self.cancelled = 0  # verworfene Kacheln, nie geladen
+
+    def __len__(self):
+        return len(self.heap)
+
+    def _entry(self, tile, order):
+        if self.view is None:
+            return 0, 0.0, order, tile
+        zoom, x, y = self.view
+        # Kachelmitte auf die Zoomstufe der Ansicht umgerechnet
+        factor = 2.0 ** (zoom - tile.zoom)
+        dx = (tile.tile_x + 0.5) * factor - x
+        dy = (tile.tile_y + 0.5) * factor - y
+        return abs(zoom - tile.zoom), dx * dx + dy * dy, order, tile
+
+    def push(self, tile):
+        with self.lock:
+            heapq.heappush(self.heap, self._entry(tile, next(self.order)))
+
+    def pop(self):
+        # wichtigste noch gebrauchte Kachel oder None
+        with self.lock:
+            heap = self.heap
+            while heap:
+                tile = heapq.heappop(heap)[3]
+                if tile.state != "done":
+                    return tile
+                self.cancelled += 1
+            return None
+
+    def set_view(self, zoom, x, y):
+        view = (zoom, x, y)
+        with self.lock:
+            if view == self.view:
+                return
+            self.view = view
+            if not self.heap:
+                return
+            entries = [self._entry(tile, order) for _, _, order, tile in self.heap if tile.state != "done"]
+            self.cancelled += len(self.heap) - len(entries)
+            heapq.heapify(entries)
+            self.heap = entries
+
+
+class CompletionQueue:
+    # Fertige Downloads auf dem Weg in den UI-Thread. Statt die offenen
+    # Futures 60-mal pro Sekunde abzufragen, hängt sich jedes fertige Future
+    # hier an und weckt den UI-Thread über wake (ein Clock-Trigger, mehrfaches
+    # Auslösen vor dem nächsten Frame zählt einmal). Ohne Downloads passiert
+    # nichts.
+
+    def __init__(self, wake):
+        self.done = deque()  # append/popleft sind threadsicher
+        self.wake = wake
+
+    def __len__(self):
+        return len(self.done)
+
+    def watch(self, future):
+        future.add_done_callback(self._completed)
+
+    def _completed(self, future):
+        # läuft im Download-Thread
+        self.done.append(future)
+        self.wake()
+
+    def drain(self, cap_time):
+        # Callbacks der fertigen Downloads im UI-Thread aufrufen, höchstens
+        # cap_time Sekunden lang; True, wenn noch welche warten
+        start = time.perf_counter()
+        done = self.done
+        while done:
+            future = done.popleft()
+            try:
+                result = future.result()
+            except Exception:
+                traceback.print_exc()
+                continue
+            if result is None:
+                continue
+            callback, args = result
+            callback(*args)
+            if time.perf_counter() - start > cap_time:
+                break
+        return bool(done)
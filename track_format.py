@@ -0,0 +1,354 @@
+import json
+import lzma
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import accumulate
+from xml.etree import ElementTree
+
+from track_store import NAN, TrackStore
+
+# Binäres Trackformat, gemeinsamer Kopf:
+#   Header     "<4sBBHII": Magic, Version, Kompression, Spaltenmaske, Punktanzahl, Länge Metadaten
+#   Metadaten  JSON (UTF-8), z.B. date, distance_km, ride_duration_sec
+#
+# v2 (kompakt):
+#   Daten      ggf. komprimiert; pro Spalte aus der Maske: u32 Länge + Varint-Strom
+#   Jede Spalte wird als Festkomma-Zahl gespeichert, davon die Differenz zum
+#   Vorgänger, zigzag-kodiert als Varint.
+#
+# v3 (per mmap lesbar):
+#   Daten      unkomprimiert, jede Spalte als little-endian Array auf 8 Byte
+#              ausgerichtet, danach optional ein Zeitindex (jeder
+#              TIME_INDEX_STRIDE-te Zeitstempel als double).
+
+FORMAT_MAGIC = b"BTRK"
+FORMAT_VERSION = 2
+FORMAT_VERSION_MAPPED = 3
+HEADER = struct.Struct("<4sBBHII")
+COLUMN_LENGTH = struct.Struct("<I")
+TIME_INDEX_FLAG = 1 << 15
+TIME_INDEX_STRIDE = 1024
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_LZMA = 2
+COMPRESSIONS = {"none": COMPRESSION_NONE, "zlib": COMPRESSION_ZLIB, "lzma": COMPRESSION_LZMA}
+
+# (Name, Festkomma-Faktor, Typ im Speicher), die Reihenfolge bestimmt das Bit
+# in der Spaltenmaske
+COLUMNS = (
+    ("lat", 1e7, "d"),  # 1e-7 Grad
+    ("lon", 1e7, "d"),
+    ("timestamp", 1e3, "d"),  # Millisekunden
+    ("accuracy", 1e2, "f"),  # Zentimeter
+    ("elevation", 1e2, "f"),
+)
+NAN_VALUE = -(1 << 62)  # Platzhalter für NaN im Festkomma-Strom
+
+
+def encode_deltas(values):
+    out = bytearray()
+    append = out.append
+    previous = 0
+    for current in values:
+        delta = current - previous
+        previous = current
+        z = delta << 1 if delta >= 0 else (-delta << 1) - 1
+        while z >= 0x80:
+            append((z & 0x7F) | 0x80)
+            z >>= 7
+        append(z)
+    return bytes(out)
+
+
+def decode_deltas(data):
+    values = []
+    append = values.append
+    z = 0
+    shift = 0
+    for byte in data:
+        if byte < 0x80:
+            z |= byte << shift
+            append(z >> 1 if not z & 1 else -((z + 1) >> 1))
+            z = 0
+            shift = 0
+        else:
+            z |= (byte & 0x7F) << shift
+            shift += 7
+    return accumulate(values)
+
+
+def _to_fixed(column, scale):
+    return (NAN_VALUE if value != value else round(value * scale) for value in column)
+
+
+def _from_fixed(values, scale, typecode):
+    return array(typecode, (NAN if value == NAN_VALUE else value / scale for value in values))
+
+
+@contextmanager
+def _atomic_write(path):
+    # erst in eine temporäre Datei, dann umbenennen: ein Absturz beim
+    # Speichern hinterlässt nie eine halb geschriebene Trackdatei
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _binary_version(path):
+    with open(path, "rb") as f:
+        head = f.read(HEADER.size)
+    if len(head) < HEADER.size or not head.startswith(FORMAT_MAGIC):
+        return None
+    return HEADER.unpack(head)[1]
+
+
+def _has_values(column):
+    # Spalten ohne einen einzigen Wert (z.B. Mock-GPS ohne Genauigkeit) entfallen
+    return column is not None and any(value == value for value in column)
+
+
+def write_track(path, track, meta=None, compression="zlib", progress=None):
+    # progress(anteil) wird nach jeder Spalte aufgerufen
+    mask = 0
+    body = bytearray()
+    for bit, (name, scale, _) in enumerate(COLUMNS):
+        column = getattr(track, name)
+        if bit >= 2 and not _has_values(column):
+            continue
+        mask |= 1 << bit
+        data = encode_deltas(_to_fixed(column, scale))
+        body += COLUMN_LENGTH.pack(len(data))
+        body += data
+        if progress:
+            progress((bit + 1) / len(COLUMNS))
+
+    mode = COMPRESSIONS[compression]
+    if mode == COMPRESSION_ZLIB:
+        body = zlib.compress(body, 6)
+    elif mode == COMPRESSION_LZMA:
+        body = lzma.compress(body)
+
+    meta_data = json.dumps(meta or {}).encode("utf8")
+    with _atomic_write(path) as f:
+        f.write(HEADER.pack(FORMAT_MAGIC, FORMAT_VERSION, mode, mask, len(track), len(meta_data)))
+        f.write(meta_data)
+        f.write(body)
+
+
+def read_binary_track(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, mode, mask, count, meta_length = HEADER.unpack_from(data)
+    if magic != FORMAT_MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"Unbekanntes Trackformat (Version {version})")
+    offset = HEADER.size
+    meta = json.loads(data[offset:offset + meta_length].decode("utf8"))
+    body = memoryview(data)[offset + meta_length:]
+    if mode == COMPRESSION_ZLIB:
+        body = memoryview(zlib.decompress(body))
+    elif mode == COMPRESSION_LZMA:
+        body = memoryview(lzma.decompress(body))
+
+    columns = {}
+    offset = 0
+    for bit, (name, scale, typecode) in enumerate(COLUMNS):
+        if not mask & (1 << bit):
+            continue
+        (length,) = COLUMN_LENGTH.unpack_from(body, offset)
+        offset += COLUMN_LENGTH.size
+        columns[name] = _from_fixed(decode_deltas(bytes(body[offset:offset + length])), scale, typecode)
+        offset += length
+        if len(columns[name]) != count:
+            raise ValueError(f"Spalte {name} ist unvollständig")
+    return TrackStore.from_columns(**columns), meta
+
+
+def read_json_track(path):
+    with open(path, "r") as f:
+        data = json.load(f)
+    points = data.pop("track_points", [])
+    track = TrackStore.from_columns(
+        array("d", (lat for lat, lon in points)),
+        array("d", (lon for lat, lon in points)),
+    )
+    return track, data
+
+
+def _gpx_time(text):
+    # ISO 8601 mit "Z", das fromisoformat erst ab Python 3.11 versteht
+    return datetime.fromisoformat(text.strip().replace("Z", "+00:00")).timestamp()
+
+
+def read_gpx_track(path):
+    # Track- (sonst Routen-)Punkte aus GPX 1.0/1.1, gestreamt mit iterparse
+    track = TrackStore()
+    for _, element in ElementTree.iterparse(path):
+        if element.tag.rpartition("}")[2] not in ("trkpt", "rtept"):
+            continue
+        ele = element.find("{*}ele")
+        when = element.find("{*}time")
+        track.append(
+            float(element.get("lat")),
+            float(element.get("lon")),
+            _gpx_time(when.text) if when is not None and when.text else NAN,
+            NAN,
+            float(ele.text) if ele is not None and ele.text else NAN,
+        )
+        element.clear()
+    meta = {}
+    if track and track.timestamp[0] == track.timestamp[0] and track.timestamp[-1] == track.timestamp[-1]:
+        meta["date"] = datetime.fromtimestamp(track.timestamp[0]).isoformat()
+        meta["ride_duration_sec"] = int(track.timestamp[-1] - track.timestamp[0])
+    return track, meta
+
+
+def _padding(offset):
+    return -offset % 8
+
+
+def _column_bytes(column, typecode):
+    data = array(typecode, column)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tobytes()
+
+
+def write_mapped_track(path, track, meta=None, progress=None):
+    # progress(anteil) wird nach jeder Spalte aufgerufen
+    count = len(track)
+    mask = 0
+    columns = []
+    for bit, (name, _, typecode) in enumerate(COLUMNS):
+        column = getattr(track, name)
+        if bit >= 2 and not _has_values(column):
+            continue
+        mask |= 1 << bit
+        columns.append((column, typecode))
+
+    # Zeitindex nur bei vollständigen, aufsteigenden Zeitstempeln
+    timestamps = track.timestamp
+    if mask & 4 and all(a <= b for a, b in zip(timestamps, timestamps[1:])):
+        mask |= TIME_INDEX_FLAG
+        columns.append((timestamps[::TIME_INDEX_STRIDE], "d"))
+
+    meta_data = json.dumps(meta or {}).encode("utf8")
+    with _atomic_write(path) as f:
+        f.write(HEADER.pack(FORMAT_MAGIC, FORMAT_VERSION_MAPPED, COMPRESSION_NONE, mask, count, len(meta_data)))
+        f.write(meta_data)
+        f.write(bytes(_padding(HEADER.size + len(meta_data))))
+        for done, (column, typecode) in enumerate(columns, 1):
+            data = _column_bytes(column, typecode)
+            f.write(data)
+            f.write(bytes(_padding(len(data))))
+            if progress:
+                progress(done / len(columns))
+
+
+class MappedTrack:
+    # Track im Format v3, direkt aus der Datei eingeblendet: Öffnen kostet
+    # unabhängig von der Größe nur den Header, die Spalten sind memoryviews
+    # auf die mmap und werden erst beim Zugriff vom Betriebssystem geladen.
+    __slots__ = ("meta", "lat", "lon", "timestamp", "accuracy", "elevation", "time_index", "_file", "_map", "_views")
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        magic, version, _, mask, count, meta_length = HEADER.unpack_from(self._map)
+        if magic != FORMAT_MAGIC or version != FORMAT_VERSION_MAPPED:
+            self.close()
+            raise ValueError(f"Unbekanntes Trackformat (Version {version})")
+        offset = HEADER.size
+        self.meta = json.loads(self._map[offset:offset + meta_length].decode("utf8"))
+        offset += meta_length
+        offset += _padding(offset)
+
+        for bit, (name, _, typecode) in enumerate(COLUMNS):
+            column = None
+            if mask & (1 << bit):
+                column, offset = self._column(offset, count, typecode)
+            setattr(self, name, column)
+        self.time_index = None
+        if mask & TIME_INDEX_FLAG:
+            self.time_index, offset = self._column(offset, -(-count // TIME_INDEX_STRIDE), "d")
+
+    def _column(self, offset, count, typecode):
+        size = count * array(typecode).itemsize
+        if offset + size > len(self._map):
+            self.close()
+            raise ValueError("Trackdatei ist unvollständig")
+        if sys.byteorder == "little":
+            view = memoryview(self._map)[offset:offset + size].cast(typecode)
+            self._views.append(view)
+        else:
+            view = array(typecode, self._map[offset:offset + size])
+            view.byteswap()
+        return view, offset + size + _padding(size)
+
+    def __len__(self):
+        return len(self.lat)
+
+    def __getitem__(self, index):
+        return self.lat[index], self.lon[index]
+
+    def points(self, start=0, stop=None):
+        yield from zip(self.lat[start:stop], self.lon[start:stop])
+
+    def seek_time(self, timestamp):
+        # erste Position mit Zeitstempel >= timestamp, O(log n) über den Zeitindex
+        if self.time_index is None:
+            raise ValueError("Track hat keinen Zeitindex")
+        block = max(bisect_left(self.time_index, timestamp) - 1, 0)
+        start = block * TIME_INDEX_STRIDE
+        stop = min(start + 2 * TIME_INDEX_STRIDE, len(self))
+        return bisect_left(self.timestamp, timestamp, start, stop)
+
+    def to_store(self):
+        # beschreibbare Kopie, z.B. um eine geladene Fahrt fortzusetzen
+        columns = {}
+        for name, _, typecode in COLUMNS:
+            column = getattr(self, name)
+            if column is not None:
+                columns[name] = array(typecode, column)
+        return TrackStore.from_columns(**columns)
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_track(path):
+    # erkennt das Format am Dateianfang, alte JSON-Tracks bleiben lesbar;
+    # GPX (aus anderen Apps) an der Endung
+    if path.lower().endswith(".gpx"):
+        return read_gpx_track(path)
+    version = _binary_version(path)
+    if version == FORMAT_VERSION_MAPPED:
+        track = MappedTrack(path)
+        return track, track.meta
+    if version is not None:
+        return read_binary_track(path)
+    return read_json_track(path)
@@ -0,0 +1,365 @@
+from array import array
+
+CHUNK_POINTS = 512
+CELL_PIXELS = 1024  # Rastergröße des Chunk-Index in Pixeln der jeweiligen Zoomstufe
+VIEW_MARGIN = 0.5  # abgefragter Bereich ist um diesen Anteil größer als der Viewport
+
+LOD_MAX_ZOOM = 18  # darüber werden alle Punkte gezeichnet
+LOD_TOLERANCE = 0.5  # erlaubte Abweichung in Pixeln
+LOD_BATCH = 64
+
+
+def douglas_peucker(xs, ys, indices, tolerance):
+    count = len(indices)
+    if count < 3:
+        return list(indices)
+    # Koordinaten einmal auslesen statt in jedem Durchlauf doppelt zu indizieren
+    xs = [xs[i] for i in indices]
+    ys = [ys[i] for i in indices]
+    keep = bytearray(count)
+    keep[0] = keep[-1] = 1
+    tolerance2 = tolerance * tolerance
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax = xs[first]
+        ay = ys[first]
+        dx = xs[last] - ax
+        dy = ys[last] - ay
+        length2 = dx * dx + dy * dy
+        max_dist = -1.0
+        max_index = first
+        for i in range(first + 1, last):
+            px = xs[i] - ax
+            py = ys[i] - ay
+            # Abstand zur Strecke: vor/hinter den Endpunkten zum Endpunkt, sonst zur Geraden
+            dot = px * dx + py * dy
+            if dot <= 0:
+                dist = px * px + py * py
+            elif dot >= length2:
+                px -= dx
+                py -= dy
+                dist = px * px + py * py
+            else:
+                cross = px * dy - py * dx
+                dist = cross * cross / length2
+            if dist > max_dist:
+                max_dist = dist
+                max_index = i
+        if max_dist > tolerance2:
+            keep[max_index] = 1
+            stack.append((first, max_index))
+            stack.append((max_index, last))
+    return [indices[i] for i in range(count) if keep[i]]
+
+
+class ChunkIndex:
+    # Teilt eine Punktfolge in Chunks fester Länge (benachbarte Chunks teilen
+    # sich einen Punkt) und trägt deren Bounding Boxes in ein grobes Raster
+    # ein, damit nur die Chunks im Viewport gesucht werden müssen.
+
+    def __init__(self, world_x, world_y, sequence, cell_size, chunk_points=CHUNK_POINTS):
+        self.world_x = world_x
+        self.world_y = world_y
+        self.sequence = sequence  # Indizes in world_x/world_y, None = alle Punkte
+        self.cell_size = cell_size
+        self.chunk_points = chunk_points
+        self.length = 0
+        self.bounds = []
+        self.cells = []
+        self.grid = {}
+
+    def __len__(self):
+        return len(self.bounds)
+
+    def index_at(self, position):
+        if self.sequence is None:
+            return position
+        return self.sequence[position]
+
+    def positions(self, chunk):
+        start = chunk * self.chunk_points
+        return range(start, min(start + self.chunk_points + 1, self.length))
+
+    def update(self, length):
+        # neue Punkte chunkweise übernehmen, Bounding Box per min/max über den Abschnitt
+        chunk_points = self.chunk_points
+        position = self.length
+        while position < length:
+            chunk = position // chunk_points
+            stop = min((chunk + 1) * chunk_points, length)
+            if self.sequence is None:
+                xs = self.world_x[position:stop]
+                ys = self.world_y[position:stop]
+            else:
+                indices = self.sequence[position:stop]
+                xs = [self.world_x[i] for i in indices]
+                ys = [self.world_y[i] for i in indices]
+            if chunk == len(self.bounds):
+                self.bounds.append([xs[0], ys[0], xs[0], ys[0]])
+                self.cells.append(None)
+            self._extend(chunk, min(xs), min(ys), max(xs), max(ys))
+            if chunk and position == chunk * chunk_points:
+                # erster Punkt eines Chunks ist zugleich letzter des vorherigen
+                self._extend(chunk - 1, xs[0], ys[0], xs[0], ys[0])
+            position = stop
+        self.length = length
+
+    def _extend(self, chunk, min_x, min_y, max_x, max_y):
+        bounds = self.bounds[chunk]
+        if min_x < bounds[0]:
+            bounds[0] = min_x
+        if max_x > bounds[2]:
+            bounds[2] = max_x
+        if min_y < bounds[1]:
+            bounds[1] = min_y
+        if max_y > bounds[3]:
+            bounds[3] = max_y
+
+        size = self.cell_size
+        cells = (int(bounds[0] // size), int(bounds[1] // size), int(bounds[2] // size), int(bounds[3] // size))
+        if cells == self.cells[chunk]:
+            return
+        self.cells[chunk] = cells
+        for cx in range(cells[0], cells[2] + 1):
+            for cy in range(cells[1], cells[3] + 1):
+                self.grid.setdefault((cx, cy), set()).add(chunk)
+
+    def intersects(self, chunk, min_x, min_y, max_x, max_y):
+        bounds = self.bounds[chunk]
+        return bounds[0] <= max_x and bounds[2] >= min_x and bounds[1] <= max_y and bounds[3] >= min_y
+
+    def query(self, min_x, min_y, max_x, max_y):
+        size = self.cell_size
+        xs = range(int(min_x // size), int(max_x // size) + 1)
+        ys = range(int(min_y // size), int(max_y // size) + 1)
+        if len(xs) * len(ys) > len(self.bounds):
+            # weit herausgezoomt: alle Chunks prüfen ist billiger als das Raster
+            found = range(len(self.bounds))
+        else:
+            found = set()
+            for cx in xs:
+                for cy in ys:
+                    chunks = self.grid.get((cx, cy))
+                    if chunks:
+                        found |= chunks
+        return {chunk for chunk in found if self.intersects(chunk, min_x, min_y, max_x, max_y)}
+
+
+class LodPyramid:
+    # Vereinfachte Varianten des Tracks, eine pro Zoomstufe. Neue Punkte
+    # landen in der höchsten Stufe und werden blockweise vereinfacht; was
+    # dort übrig bleibt, wandert an die nächstniedrigere Stufe weiter.
+    # Pro Stufe: levels[z] ist fertig vereinfacht (nur Anhängen),
+    # pending[z] wartet noch auf den nächsten Block.
+
+    def __init__(self, world_x, world_y, max_zoom=LOD_MAX_ZOOM, tolerance=LOD_TOLERANCE, batch=LOD_BATCH):
+        self.world_x = world_x
+        self.world_y = world_y
+        self.max_zoom = max_zoom
+        self.tolerance = tolerance
+        self.batch = batch
+        self.levels = [array("I") for _ in range(max_zoom + 1)]
+        self.pending = [array("I") for _ in range(max_zoom + 1)]
+        self.indexes = [
+            ChunkIndex(world_x, world_y, self.levels[zoom], CELL_PIXELS / 2.0 ** zoom)
+            for zoom in range(max_zoom + 1)
+        ]
+        self.raw_index = ChunkIndex(world_x, world_y, None, CELL_PIXELS / 2.0 ** (max_zoom + 1))
+
+    def chunk_index(self, level):
+        if level is None:
+            return self.raw_index
+        return self.indexes[level]
+
+    def append(self, index):
+        return self.extend(index, index + 1)
+
+    def extend(self, start, stop):
+        # nimmt die Punkte start..stop-1 auf; True, wenn sich dabei eine
+        # vereinfachte Stufe geändert hat
+        self.raw_index.update(stop)
+        return self._push(self.max_zoom, range(start, stop))
+
+    def _push(self, zoom, indices):
+        pending = self.pending[zoom]
+        pending.extend(indices)
+        batch = self.batch
+        if len(pending) < batch:
+            return False
+        # Toleranz in Weltkoordinaten (Zoom 0) für diese Zoomstufe
+        tolerance = self.tolerance / 2.0 ** zoom
+        committed = array("I")
+        start = 0
+        # immer in Blöcken fester Länge, egal ob Punkte einzeln oder als
+        # ganzer Track ankommen; der letzte Punkt eines Blocks beginnt den nächsten
+        while len(pending) - start >= batch:
+            kept = douglas_peucker(self.world_x, self.world_y, pending[start:start + batch], tolerance)
+            committed.extend(kept[:-1])
+            start += batch - 1
+        self.levels[zoom].extend(committed)
+        self.indexes[zoom].update(len(self.levels[zoom]))
+        self.pending[zoom] = pending[start:]
+        if zoom > 0:
+            self._push(zoom - 1, committed)
+        return True
+
+    def tail(self, zoom):
+        tail = array("I")
+        for level in range(zoom, self.max_zoom + 1):
+            tail.extend(self.pending[level])
+        return tail
+
+
+class TrackGeometry:
+    # Track-Punkte einmalig in Weltkoordinaten (Zoom 0) plus die daraus
+    # skalierten Vertices für den aktuellen Zoom. Gezeichnet wird die zum
+    # Zoom passende Stufe der LodPyramid: vom fertig vereinfachten Teil nur
+    # die Chunks im Viewport, der noch offene Rest immer als eigener Tail.
+
+    def __init__(self, project, chunk_points=CHUNK_POINTS):
+        self.project = project  # (lat, lon) -> Weltkoordinaten bei Zoom 0
+        self.chunk_points = chunk_points
+        self.zoom = None
+        self.factor = 1.0
+        self.clear()
+
+    @property
+    def count(self):
+        return len(self.world_x)
+
+    @property
+    def origin_x(self):
+        return self.world_x[0] if self.world_x else 0.0
+
+    @property
+    def origin_y(self):
+        return self.world_y[0] if self.world_y else 0.0
+
+    @property
+    def level(self):
+        if self.zoom is None or self.zoom > self.pyramid.max_zoom:
+            return None
+        return int(self.zoom)
+
+    @property
+    def index(self):
+        return self.pyramid.chunk_index(self.level)
+
+    def clear(self):
+        self.world_x = array("d")
+        self.world_y = array("d")
+        self.pyramid = LodPyramid(self.world_x, self.world_y)
+        self._clear_chunks()
+
+    def _clear_chunks(self):
+        self.chunks = {}  # sichtbare Chunks: Nummer -> Vertices
+        self.region = None
+        self.committed = 0
+        self.tail = array("f")
+        self.dirty = set()
+        self.removed = set()
+        self.tail_dirty = True
+        self.reset = True
+
+    def set_view(self, zoom, min_x, min_y, max_x, max_y):
+        if zoom != self.zoom:
+            self.zoom = zoom
+            self.factor = 2.0 ** zoom
+            self._clear_chunks()
+            self.committed = self.index.length
+            self._update_tail(True)
+
+        region = self.region
+        if region and min_x >= region[0] and min_y >= region[1] and max_x <= region[2] and max_y <= region[3]:
+            return
+        margin_x = (max_x - min_x) * VIEW_MARGIN
+        margin_y = (max_y - min_y) * VIEW_MARGIN
+        self.region = (min_x - margin_x, min_y - margin_y, max_x + margin_x, max_y + margin_y)
+
+        visible = self.index.query(*self.region)
+        for chunk in list(self.chunks):
+            if chunk not in visible:
+                del self.chunks[chunk]
+                self.dirty.discard(chunk)
+                self.removed.add(chunk)
+        for chunk in visible:
+            if chunk not in self.chunks:
+                self._build_chunk(chunk)
+
+    def append(self, lat, lon):
+        self.extend(((lat, lon),))
+
+    def extend(self, points):
+        # beliebig viele Punkte auf einmal: Pyramide, Chunks und Tail werden
+        # nur einmal für den ganzen Block aktualisiert
+        start = self.count
+        project = self.project
+        world_x = self.world_x
+        world_y = self.world_y
+        for lat, lon in points:
+            wx, wy = project(lat, lon)
+            world_x.append(wx)
+            world_y.append(wy)
+        if self.count == start:
+            return
+        changed = self.pyramid.extend(start, self.count)
+        if self.zoom is None:
+            return
+
+        index = self.index
+        if index.length > self.committed:
+            first = (self.committed - 1) // self.chunk_points if self.committed else 0
+            region = self.region
+            for chunk in range(first, len(index)):
+                if region and index.intersects(chunk, *region):
+                    self._build_chunk(chunk)
+            self.committed = index.length
+        self._update_tail(changed, start)
+
+    def _update_tail(self, changed, start=None):
+        level = self.level
+        if level is None:
+            return
+        if changed:
+            tail = self.tail = array("f")
+            index = self.index
+            # der Tail setzt am letzten fertigen Punkt an
+            if index.length:
+                tail.extend(self._vertex(index.index_at(index.length - 1)))
+            for i in self.pyramid.tail(level):
+                tail.extend(self._vertex(i))
+        else:
+            # nur die neuen Rohpunkte sind hinten dazugekommen
+            for i in range(start, self.count):
+                self.tail.extend(self._vertex(i))
+        self.tail_dirty = True
+
+    def _vertex(self, index):
+        # Vertices relativ zum ersten Punkt, damit float32 auf der GPU reicht
+        return (
+            (self.world_x[index] - self.world_x[0]) * self.factor,
+            (self.world_y[index] - self.world_y[0]) * self.factor,
+        )
+
+    def _build_chunk(self, chunk):
+        index = self.index
+        vertices = self.chunks.get(chunk)
+        if vertices is None:
+            vertices = self.chunks[chunk] = array("f")
+            self.removed.discard(chunk)
+        # bereits projizierte Punkte des Chunks bleiben stehen
+        for position in index.positions(chunk)[len(vertices) // 2:]:
+            vertices.extend(self._vertex(index.index_at(position)))
+        self.dirty.add(chunk)
+
+    def vertex_count(self):
+        return sum(len(vertices) for vertices in self.chunks.values()) // 2 + len(self.tail) // 2
+
+    def pop_changes(self):
+        changes = (self.reset, sorted(self.dirty), sorted(self.removed), self.tail_dirty)
+        self.reset = False
+        self.dirty = set()
+        self.removed = set()
+        self.tail_dirty = False
+        return changes
@@ -0,0 +1,94 @@
+from kivy.graphics import Canvas, Color, Line, MatrixInstruction, PopMatrix, PushMatrix, Translate
+from kivy.properties import ListProperty, NumericProperty
+from kivy_garden.mapview import MapLayer
+
+from track_geometry import TrackGeometry
+
+
+class TrackLayer(MapLayer):
+    # Live- bzw. geladener Track. Verschieben und Zoomen ändern nur die
+    # Matrix-Instruktionen, die Vertices bleiben auf der GPU. Erst beim
+    # Wechsel der ganzen Zoomstufe wird die passende Vereinfachung geladen,
+    # und nur Chunks in der Nähe des Viewports liegen im Canvas.
+    color = ListProperty([1, 0, 0, 1])
+    line_width = NumericProperty(2)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.geometry = TrackGeometry(self.project)
+        self.lines = {}
+        self.tail_line = None
+
+        with self.canvas:
+            self.canvas_line = Canvas()
+        with self.canvas_line.before:
+            PushMatrix()
+            self.g_matrix = MatrixInstruction()
+            self.g_translate = Translate()
+            self.g_color = Color(*self.color)
+        with self.canvas_line.after:
+            PopMatrix()
+
+    def on_color(self, instance, color):
+        self.g_color.rgba = color
+
+    @property
+    def count(self):
+        return self.geometry.count
+
+    def project(self, lat, lon):
+        map_source = self.parent.map_source
+        return map_source.get_x(0, lon), map_source.get_y(0, lat)
+
+    def update(self, track, stop=None):
+        # stop begrenzt, wie weit der Track in diesem Aufruf übernommen wird
+        geometry = self.geometry
+        if len(track) > geometry.count:
+            geometry.extend(track.points(geometry.count, stop))
+        self.reposition()
+
+    def clear(self):
+        self.geometry.clear()
+        self.sync()
+
+    def reposition(self):
+        mapview = self.parent
+        if mapview is None:
+            return
+        geometry = self.geometry
+        bbox = mapview.get_bbox()
+        x1, y1 = self.project(bbox[0], bbox[1])
+        x2, y2 = self.project(bbox[2], bbox[3])
+        geometry.set_view(mapview.zoom, min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+        self.sync()
+
+        self.g_matrix.matrix = mapview._scatter.transform
+        self.g_translate.xy = (
+            mapview.delta_x + geometry.origin_x * geometry.factor,
+            mapview.delta_y + geometry.origin_y * geometry.factor,
+        )
+
+    def sync(self):
+        reset, dirty, removed, tail_dirty = self.geometry.pop_changes()
+        if reset:
+            self.canvas_line.clear()
+            self.lines = {}
+            self.tail_line = Line(points=[], width=self.line_width)
+            self.canvas_line.add(self.tail_line)
+        if tail_dirty:
+            self.tail_line.points = self.geometry.tail
+        for chunk in removed:
+            line = self.lines.pop(chunk, None)
+            if line:
+                self.canvas_line.remove(line)
+        chunks = self.geometry.chunks
+        for chunk in dirty:
+            line = self.lines.get(chunk)
+            if line:
+                line.points = chunks[chunk]
+            else:
+                line = self.lines[chunk] = Line(points=chunks[chunk], width=self.line_width)
+                self.canvas_line.add(line)
+
+    def unload(self):
+        self.clear()
@@ -0,0 +1,74 @@
+from array import array
+
+NAN = float("nan")
+
+
+class TrackStore:
+    # Track-Punkte spaltenweise in array-Puffern statt als Liste von Tupeln:
+    # 32 Byte pro Punkt, Anhängen amortisiert O(1).
+    __slots__ = ("lat", "lon", "timestamp", "accuracy", "elevation")
+
+    def __init__(self):
+        self.lat = array("d")
+        self.lon = array("d")
+        self.timestamp = array("d")  # Sekunden seit Epoch
+        self.accuracy = array("f")  # Meter, NaN wenn unbekannt
+        self.elevation = array("f")  # Meter, NaN wenn unbekannt
+
+    @classmethod
+    def from_columns(cls, lat, lon, timestamp=None, accuracy=None, elevation=None):
+        # übernimmt fertige array-Spalten ohne Kopie, fehlende werden mit NaN gefüllt
+        track = cls()
+        track.lat = lat
+        track.lon = lon
+        for name, column in (("timestamp", timestamp), ("accuracy", accuracy), ("elevation", elevation)):
+            if column is None:
+                typecode = getattr(track, name).typecode
+                column = array(typecode, [NAN]) * len(lat)
+            setattr(track, name, column)
+        return track
+
+    def copy(self):
+        # Momentaufnahme, z.B. zum Speichern im Hintergrund während weiter aufgezeichnet wird
+        return TrackStore.from_columns(*(array(getattr(self, name).typecode, getattr(self, name)) for name in self.__slots__))
+
+    def __len__(self):
+        return len(self.lat)
+
+    def __getitem__(self, index):
+        return self.lat[index], self.lon[index]
+
+    def append(self, lat, lon, timestamp=NAN, accuracy=NAN, elevation=NAN):
+        self.lat.append(lat)
+        self.lon.append(lon)
+        self.timestamp.append(timestamp)
+        self.accuracy.append(accuracy)
+        self.elevation.append(elevation)
+
+    def extend(self, lat, lon, timestamp=None, accuracy=None, elevation=None):
+        # ganze Spalten auf einmal (Liste, array oder memoryview), fehlende mit NaN
+        count = len(lat)
+        for name, values in zip(self.__slots__, (lat, lon, timestamp, accuracy, elevation)):
+            column = getattr(self, name)
+            if values is None:
+                column.extend(array(column.typecode, [NAN]) * count)
+            elif isinstance(values, memoryview) and values.format == column.typecode:
+                column.frombytes(values.cast("B"))
+            else:
+                column.extend(values)
+
+    def clear(self):
+        for name in self.__slots__:
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode))
+
+    def view(self, name, start=0, stop=None):
+        # ohne Kopie; solange die View lebt, kann die Spalte nicht wachsen
+        return memoryview(getattr(self, name))[start:stop]
+
+    def points(self, start=0, stop=None):
+        with self.view("lat", start, stop) as lat, self.view("lon", start, stop) as lon:
+            yield from zip(lat, lon)
+
+    def nbytes(self):
+        return sum(getattr(self, name).buffer_info()[1] * getattr(self, name).itemsize for name in self.__slots__)
@@ -0,0 +1,220 @@
+import time
+from datetime import datetime
+
+from geodesy import DistanceMeter, track_distance_km
+from ride_clock import RideClock
+from ride_stats import RideStats
+from track_format import MappedTrack
+from track_store import NAN, TrackStore
+
+IDLE = "idle"
+RUNNING = "running"
+PAUSED = "paused"
+
+
+class TrackingEngine:
+    # Die Fahrt ohne Oberfläche: nimmt Fixes auf, führt Distanz, Geschwindigkeit
+    # und Fahrtdauer, kennt den Pausenzustand und schreibt ins Journal. Die
+    # UI (oder ein Skript) meldet sich mit bind() an und wird pro Ereignis
+    # benachrichtigt: "fix", "tick", "state", "reset", "loaded".
+    # Ein optionaler FixFilter sitzt vor der Aufnahme: verworfene oder
+    # ausgedünnte Fixes landen weder im Track noch im Journal.
+    # Die Fahrtdauer führt eine RideClock; "tick" ist nur noch der Anstoß
+    # für die Anzeige, gezählt wird damit nichts. Geschwindigkeit und die
+    # übrigen Kennzahlen kommen gleitend aus RideStats.
+
+    def __init__(self, journal=None, fix_filter=None):
+        self.journal = journal
+        self.fix_filter = fix_filter
+        self.observers = []
+        self.state = IDLE
+        self.track = TrackStore()
+        self.saved = True
+        self.meter = DistanceMeter()
+        self.clock = RideClock()
+        self.stats = RideStats()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.meter.reset()
+        self.distance = 0.0  # km
+        self.speed = 0.0  # km/h, gleitend über das kürzeste Fenster
+        self.clock.reset()
+        self.stats.reset()
+        self.last_lat = None
+        self.last_lon = None
+        self.last_time = None  # Sekunden seit Epoch
+
+    def bind(self, callback):
+        # callback(event, engine)
+        self.observers.append(callback)
+
+    def unbind(self, callback):
+        self.observers.remove(callback)
+
+    def notify(self, event):
+        for callback in self.observers:
+            callback(event, self)
+
+    @property
+    def ride_duration(self):
+        # ganze Sekunden, bei jedem Zugriff frisch von der Uhr
+        return int(self.clock.elapsed())
+
+    @property
+    def running(self):
+        return self.state == RUNNING
+
+    @property
+    def paused(self):
+        return self.state == PAUSED
+
+    def _set_state(self, state):
+        self.state = state
+        self.notify("state")
+
+    def start(self):
+        self.reset()
+        self.saved = False
+        if self.journal:
+            self.journal.open()
+        self.clock.start()
+        self._set_state(RUNNING)
+
+    def pause(self):
+        self.clock.stop()
+        if self.journal:
+            self.journal.flush(sync=True)
+        self._set_state(PAUSED)
+
+    def resume(self):
+        if self.journal and not self.journal.is_open:
+            self.journal.open(append=True)
+        self.clock.start()
+        self._set_state(RUNNING)
+
+    def stop(self):
+        self.clock.stop()
+        if self.journal:
+            self.journal.close()
+        self._set_state(IDLE)
+
+    def reset(self):
+        if isinstance(self.track, MappedTrack):
+            self.track.close()
+        self.track = TrackStore()
+        self.saved = True
+        self._reset_stats()
+        if self.fix_filter:
+            self.fix_filter.reset()
+        if self.journal:
+            self.journal.discard()
+        self.state = IDLE
+        self.notify("reset")
+
+    def add_fix(self, lat, lon, timestamp=None, accuracy=NAN, elevation=NAN):
+        # False, wenn der Fix verworfen wurde (keine laufende Fahrt oder vom
+        # Filter). Auch nach stop()/reset()/load() können noch Fixes kommen,
+        # z.B. schon auf der Clock eingeplante NMEA-Fixes; das Journal ist
+        # dann zu und nichts würde sie schützen.
+        if self.state != RUNNING:
+            return False
+        if timestamp is None:
+            timestamp = time.time()
+        if self.fix_filter:
+            dropped = self.fix_filter.dropped
+            fix = self.fix_filter.process(lat, lon, timestamp, accuracy)
+            if fix is None:
+                if self.fix_filter.dropped != dropped and self.last_time is not None:
+                    # ausgedünnt, nicht verworfen: die Zeit läuft für die
+                    # Statistik weiter, sonst bliebe die Geschwindigkeit im Stand stehen
+                    self.stats.add(timestamp, 0.0)
+                    self.speed = self.stats.speed()
+                return False
+            lat, lon = fix
+        dist = self.meter.add(lat, lon)
+        self.distance = self.meter.total
+        self.stats.add(timestamp, dist)
+        self.speed = self.stats.speed()
+        self.last_lat = lat
+        self.last_lon = lon
+        self.last_time = timestamp
+
+        if isinstance(self.track, MappedTrack):
+            # geladener Track wird fortgesetzt: beschreibbare Kopie anlegen
+            mapped = self.track
+            self.track = mapped.to_store()
+            mapped.close()
+        self.track.append(lat, lon, timestamp, accuracy, elevation)
+        if self.journal:
+            self.journal.append(timestamp, lat, lon, accuracy)
+        self.saved = False
+        self.notify("fix")
+        return True
+
+    def tick(self):
+        if self.state != RUNNING:
+            return
+        self.notify("tick")
+
+    def load(self, track, meta, distance=None):
+        # die Distanz wird aus den Punkten neu berechnet, nicht aus meta
+        # übernommen; wer sie schon hat (z.B. aus dem Lade-Thread), gibt sie mit
+        self.reset()
+        self.track = track
+        if distance is None:
+            distance = track_distance_km(track.lat, track.lon)
+        self.distance = distance
+        self.clock.reset(meta.get("ride_duration_sec", 0))
+        self.notify("loaded")
+
+    def recover(self, records):
+        # Journal-Records (Zeitstempel, lat, lon, Genauigkeit) als laufende,
+        # noch nicht gespeicherte Fahrt übernehmen
+        self.reset()
+        if self.journal:
+            # bis zum Speichern bleibt das Journal bestehen
+            self.journal.open()
+            for record in records:
+                self.journal.append(*record)
+            self.journal.close()
+        timestamps, lats, lons, accuracies = zip(*records)
+        self.track.extend(lats, lons, timestamps, accuracies)
+        for timestamp, lat, lon in zip(timestamps, lats, lons):
+            self.stats.add(timestamp, self.meter.add(lat, lon))
+        self.distance = self.meter.total
+        self.speed = self.stats.speed()
+        self.last_lat = lats[-1]
+        self.last_lon = lons[-1]
+        self.last_time = timestamps[-1]
+        self.clock.reset(timestamps[-1] - timestamps[0])
+        self.saved = False
+        self.notify("loaded")
+
+    def snapshot(self):
+        # Momentaufnahme zum Speichern im Hintergrund, die Fahrt läuft weiter
+        if isinstance(self.track, MappedTrack):
+            return self.track.to_store()
+        return self.track.copy()
+
+    def meta(self):
+        return {
+            "date": datetime.now().isoformat(),
+            "distance_km": self.distance,
+            "ride_duration_sec": self.ride_duration,
+        }
+
+    def mark_saved(self, count):
+        # count: Punkte in der gespeicherten Momentaufnahme. Sind seitdem
+        # weitere dazugekommen, ist die Fahrt nicht vollständig gespeichert
+        # und das Journal muss bleiben.
+        if len(self.track) != count:
+            return
+        self.saved = True
+        # während einer laufenden Fahrt wird weiter mitgeschrieben
+        if self.journal and not self.journal.is_open:
+            self.journal.discard()
+
+    def close(self):
+        if self.journal:
+            self.journal.close()